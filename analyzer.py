@@ -8,17 +8,29 @@ import cv2
 import numpy as np
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
 import time
 import threading
+import queue
+import multiprocessing
+import itertools
+import asyncio
 import logging
 import os
 import json
+import math
+import random
+import hashlib
+import socket
+import shutil
+import subprocess
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from cryptography.fernet import Fernet
 import requests
 from PIL import Image
-import torch
-from transformers import ViTForImageClassification, ViTFeatureExtractor
 import base64
 from io import BytesIO
 
@@ -33,8 +45,2449 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Référence pour le rapport de démarrage (torch et transformers sont importés à la demande)
+PROCESS_START = time.perf_counter()
+
+class _Timer:
+    """Chronomètre d'une étape, enregistré dans un histogramme à la sortie du bloc"""
+    
+    __slots__ = ('metrics', 'name', 'labels', 'start')
+    
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+        
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+class _NullTimer:
+    """Chronomètre inactif (métriques désactivées)"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc):
+        return False
+
+class Metrics:
+    """
+    Métriques au format texte Prometheus: compteurs et histogrammes étiquetés, jauges calculées
+    à la lecture (collecteurs). Désactivées, toutes les opérations reviennent immédiatement.
+    """
+    
+    LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    NULL_TIMER = _NullTimer()
+    
+    def __init__(self, enabled=True, prefix='analyzer'):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        # (nom, étiquettes triées) -> valeur
+        self.counters = {}
+        # (nom, étiquettes triées) -> [compte par bucket..., somme, total]
+        self.histograms = {}
+        self.buckets = {}
+        self.help = {}
+        # Fonctions retournant des jauges [(nom, étiquettes, valeur)] au moment de la lecture
+        self.collectors = []
+        self.server = None
+        self.textfile_thread = None
+        self.running = False
+        
+    def describe(self, name, help_text, buckets=None):
+        """Texte d'aide et buckets (histogrammes) d'une métrique"""
+        self.help[name] = help_text
+        if buckets is not None:
+            self.buckets[name] = tuple(buckets)
+            
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+            
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        buckets = self.buckets.get(name, self.LATENCY_BUCKETS)
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = [0] * (len(buckets) + 2)
+                self.histograms[key] = histogram
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[index] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+            
+    def timer(self, name, **labels):
+        """Bloc with chronométré (secondes) dans l'histogramme name"""
+        if not self.enabled:
+            return self.NULL_TIMER
+        return _Timer(self, name, labels)
+        
+    def register_collector(self, collector):
+        if self.enabled:
+            self.collectors.append(collector)
+            
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ''
+        text = ','.join(f'{key}="{str(value).replace(chr(34), chr(39))}"' for key, value in labels)
+        return '{' + text + '}'
+        
+    def render(self):
+        """Exposition au format texte Prometheus"""
+        lines = []
+        described = set()
+        
+        def header(name, kind):
+            if name not in described:
+                described.add(name)
+                if name in self.help:
+                    lines.append(f'# HELP {self.prefix}_{name} {self.help[name]}')
+                lines.append(f'# TYPE {self.prefix}_{name} {kind}')
+                
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, list(values)) for key, values in self.histograms.items())
+            
+        for (name, labels), value in counters:
+            header(name, 'counter')
+            lines.append(f'{self.prefix}_{name}{self._labels(labels)} {value}')
+            
+        for (name, labels), values in histograms:
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(self.buckets.get(name, self.LATENCY_BUCKETS), values):
+                cumulative += count
+                lines.append(f'{self.prefix}_{name}_bucket{self._labels(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{self.prefix}_{name}_bucket{self._labels(labels + (("le", "+Inf"),))} {values[-1]}')
+            lines.append(f'{self.prefix}_{name}_sum{self._labels(labels)} {values[-2]}')
+            lines.append(f'{self.prefix}_{name}_count{self._labels(labels)} {values[-1]}')
+            
+        for collector in list(self.collectors):
+            try:
+                gauges = collector()
+            except Exception as e:
+                logger.error(f"Erreur collecte des métriques: {e}")
+                continue
+            for name, labels, value in gauges:
+                if value is None:
+                    continue
+                header(name, 'gauge')
+                lines.append(f'{self.prefix}_{name}{self._labels(tuple(sorted(labels.items())))} {float(value)}')
+                
+        return '\n'.join(lines) + '\n'
+        
+    def start(self, port=0, textfile='', interval=15.0):
+        """Expose les métriques sur http://0.0.0.0:<port>/metrics et/ou dans un fichier texte"""
+        if not self.enabled:
+            return
+        self.running = True
+        
+        if port:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+            metrics = self
+            
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] not in ('/metrics', '/'):
+                        self.send_error(404)
+                        return
+                    body = metrics.render().encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    
+                def log_message(self, format, *args):
+                    pass
+                    
+            try:
+                self.server = ThreadingHTTPServer(('0.0.0.0', port), MetricsHandler)
+                self.server.daemon_threads = True
+                threading.Thread(target=self.server.serve_forever, name='metrics-http', daemon=True).start()
+                logger.info(f"Métriques exposées sur le port {port}")
+            except OSError as e:
+                logger.error(f"Impossible d'ouvrir le port de métriques {port}: {e}")
+                
+        if textfile:
+            self.textfile_thread = threading.Thread(
+                target=self._write_textfile, args=(textfile, interval), name='metrics-textfile', daemon=True
+            )
+            self.textfile_thread.start()
+            
+    def _write_textfile(self, path, interval):
+        """Écriture atomique périodique (collecteur textfile de node_exporter)"""
+        while self.running:
+            try:
+                temporary = f'{path}.tmp'
+                with open(temporary, 'w') as f:
+                    f.write(self.render())
+                os.replace(temporary, path)
+            except OSError as e:
+                logger.error(f"Erreur écriture des métriques {path}: {e}")
+            for _ in range(int(max(1.0, interval) * 2)):
+                if not self.running:
+                    break
+                time.sleep(0.5)
+                
+    def stop(self):
+        self.running = False
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.textfile_thread:
+            self.textfile_thread.join(timeout=5)
+
+def logits_module(model):
+    """Enveloppe un modèle de classification HF pour ne retourner que les logits"""
+    import torch
+    
+    class LogitsModule(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+            
+        def forward(self, pixel_values):
+            return self.model(pixel_values=pixel_values).logits
+            
+    return LogitsModule(model)
+
+class EagerBackend:
+    """Inférence PyTorch eager (FP32, ou INT8 dynamique sur les couches Linear)"""
+    
+    name = 'eager'
+    
+    def __init__(self, model, quantize=False):
+        import torch
+        self.model = model.eval()
+        if quantize:
+            self.model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            
+    def __call__(self, pixel_values):
+        import torch
+        with torch.no_grad():
+            return self.model(pixel_values=pixel_values).logits
+
+class TorchScriptBackend:
+    """Modèle tracé en TorchScript, exporté une fois puis rechargé depuis le cache disque"""
+    
+    name = 'torchscript'
+    
+    def __init__(self, model, artifact_path, input_size=224, quantize=False):
+        import torch
+        if os.path.exists(artifact_path):
+            logger.info(f"Chargement du modèle TorchScript en cache: {artifact_path}")
+        else:
+            logger.info(f"Export TorchScript du modèle: {artifact_path}")
+            module = logits_module(model.eval())
+            if quantize:
+                module = torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+            example = torch.zeros(1, 3, input_size, input_size)
+            with torch.no_grad():
+                traced = torch.jit.trace(module, example)
+            os.makedirs(os.path.dirname(artifact_path) or '.', exist_ok=True)
+            traced.save(artifact_path)
+            
+        self.module = torch.jit.optimize_for_inference(torch.jit.load(artifact_path).eval())
+        
+    def __call__(self, pixel_values):
+        import torch
+        with torch.no_grad():
+            return self.module(pixel_values)
+
+class OnnxBackend:
+    """Modèle exporté en ONNX (INT8 dynamique optionnel) exécuté par ONNX Runtime"""
+    
+    name = 'onnx'
+    
+    def __init__(self, model, artifact_path, input_size=224, quantize=False, num_threads=None):
+        import onnxruntime
+        import torch
+        
+        fp32_path = artifact_path.replace('-int8', '') if quantize else artifact_path
+        if not os.path.exists(fp32_path):
+            logger.info(f"Export ONNX du modèle: {fp32_path}")
+            os.makedirs(os.path.dirname(fp32_path) or '.', exist_ok=True)
+            example = torch.zeros(1, 3, input_size, input_size)
+            with torch.no_grad():
+                torch.onnx.export(
+                    logits_module(model.eval()), example, fp32_path,
+                    input_names=['pixel_values'], output_names=['logits'],
+                    dynamic_axes={'pixel_values': {0: 'batch'}, 'logits': {0: 'batch'}},
+                    opset_version=14
+                )
+                
+        if quantize and not os.path.exists(artifact_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            from onnxruntime.quantization.shape_inference import quant_pre_process
+            logger.info(f"Quantification INT8 du modèle ONNX: {artifact_path}")
+            # Inférence de formes et optimisation du graphe recommandées avant quantification
+            preprocessed_path = artifact_path.replace('-int8', '-pre')
+            quant_pre_process(fp32_path, preprocessed_path)
+            quantize_dynamic(preprocessed_path, artifact_path, weight_type=QuantType.QInt8)
+            os.remove(preprocessed_path)
+            
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(artifact_path, options, providers=['CPUExecutionProvider'])
+        
+    def __call__(self, pixel_values):
+        import torch
+        logits = self.session.run(['logits'], {'pixel_values': pixel_values.numpy()})[0]
+        return torch.from_numpy(logits)
+
+def create_inference_backend(model, model_name, kind='eager', quantize=False, cache_dir='storage/models',
+                             input_size=224, num_threads=None):
+    """Crée le backend d'inférence demandé, avec repli sur eager en cas d'échec"""
+    import torch
+    suffix = '-int8' if quantize else ''
+    artifact_name = f"{model_name.replace('/', '--')}-torch{torch.__version__.split('+')[0]}{suffix}"
+    
+    try:
+        if kind == 'torchscript':
+            return TorchScriptBackend(model, os.path.join(cache_dir, artifact_name + '.pt'), input_size, quantize)
+        if kind == 'onnx':
+            return OnnxBackend(model, os.path.join(cache_dir, artifact_name + '.onnx'), input_size, quantize,
+                               num_threads)
+        if kind != 'eager':
+            logger.warning(f"Backend d'inférence inconnu '{kind}', utilisation de eager")
+    except Exception as e:
+        logger.error(f"Erreur backend d'inférence {kind}, repli sur eager: {e}")
+        
+    return EagerBackend(model, quantize)
+
+class FramePreprocessor:
+    """
+    Prétraitement vectorisé frame BGR OpenCV -> tenseur float32 NCHW normalisé,
+    équivalent au ViTFeatureExtractor. Le redimensionnement OpenCV (INTER_AREA) s'écarte
+    de quelques niveaux du filtre PIL; exact_resize=True utilise le même filtre PIL.
+    """
+    
+    def __init__(self, size=(224, 224), mean=(0.5, 0.5, 0.5), std=(0.5, 0.5, 0.5), rescale_factor=1 / 255,
+                 max_batch_size=16, interpolation=cv2.INTER_AREA, exact_resize=False):
+        # size = (hauteur, largeur)
+        self.size = (int(size[0]), int(size[1]))
+        self.interpolation = interpolation
+        self.exact_resize = exact_resize
+        
+        # Table par canal RGB: valeur uint8 -> (v * rescale - mean) / std, en une seule passe
+        values = np.arange(256, dtype=np.float64) * rescale_factor
+        self.lut = np.stack([(values - m) / s for m, s in zip(mean, std)]).astype(np.float32)
+        # Spécification d'entrée: deux modèles de même spécification partagent le même tenseur
+        self.spec = (self.size, tuple(float(m) for m in mean), tuple(float(s) for s in std),
+                     float(rescale_factor), interpolation, exact_resize)
+        
+        self.output = None
+        self._allocate(max_batch_size)
+        
+    @classmethod
+    def from_feature_extractor(cls, feature_extractor, max_batch_size=16, exact_resize=False):
+        """Reprend taille, moyenne, écart-type et facteur d'échelle d'un extracteur HF"""
+        size = feature_extractor.size
+        if isinstance(size, dict):
+            size = (size.get('height', size.get('shortest_edge')), size.get('width', size.get('shortest_edge')))
+        elif isinstance(size, int):
+            size = (size, size)
+            
+        mean = feature_extractor.image_mean if feature_extractor.do_normalize else (0.0, 0.0, 0.0)
+        std = feature_extractor.image_std if feature_extractor.do_normalize else (1.0, 1.0, 1.0)
+        rescale_factor = feature_extractor.rescale_factor if getattr(feature_extractor, 'do_rescale', True) else 1.0
+        return cls(size, mean, std, rescale_factor, max_batch_size, exact_resize=exact_resize)
+        
+    def _allocate(self, batch_size):
+        self.output = np.empty((batch_size, 3, self.size[0], self.size[1]), dtype=np.float32)
+        
+    def resize(self, frame):
+        """Redimensionne une frame BGR uint8 à la taille d'entrée du modèle"""
+        if frame.shape[:2] == self.size:
+            return frame
+        if self.exact_resize:
+            # Filtre bilinéaire PIL (identique à l'extracteur HF), canal par canal donc BGR inchangé
+            return np.asarray(Image.fromarray(frame).resize((self.size[1], self.size[0]), Image.BILINEAR))
+        return cv2.resize(frame, (self.size[1], self.size[0]), interpolation=self.interpolation)
+        
+    def normalize(self, resized_frames):
+        """
+        Normalise un lot de frames BGR déjà redimensionnées dans le tampon préalloué.
+        Le tenseur retourné partage ce tampon: il est valide jusqu'au prochain appel.
+        """
+        import torch
+        count = len(resized_frames)
+        if count > len(self.output):
+            self._allocate(count)
+            
+        batch = resized_frames[0][None] if count == 1 else np.stack(resized_frames)
+        output = self.output[:count]
+        # Canal RGB c = canal BGR 2 - c, la table applique mise à l'échelle et normalisation
+        for channel in range(3):
+            np.take(self.lut[channel], batch[..., 2 - channel], out=output[:, channel])
+            
+        return torch.from_numpy(output)
+        
+    def __call__(self, frames):
+        """Redimensionne et normalise un lot de frames BGR"""
+        return self.normalize([self.resize(frame) for frame in frames])
+
+class InferenceEngine:
+    """
+    Serveur d'inférence centralisé avec batching dynamique entre caméras et entre modèles.
+    Les modèles de même spécification d'entrée (taille, normalisation) partagent le
+    redimensionnement et le tenseur normalisé de chaque batch.
+    """
+    
+    DEFAULT_MODEL = 'default'
+    
+    def __init__(self, model=None, preprocessor=None, max_batch_size=16, max_wait_ms=20, num_threads=None,
+                 backend=None):
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.num_threads = num_threads
+        
+        # nom -> (backend, étiquettes, spécification d'entrée, batch max); spécification -> prétraitement
+        self.models = {}
+        self.preprocessors = {}
+        if model is not None:
+            self.add_model(self.DEFAULT_MODEL, backend or EagerBackend(model), model.config.id2label, preprocessor)
+        
+        self.requests = queue.Queue()
+        self.running = False
+        self.thread = None
+        
+        # Statistiques (latences des dernières requêtes en secondes)
+        self.stats_lock = threading.Lock()
+        self.latencies = deque(maxlen=1000)
+        self.total_requests = 0
+        self.total_batches = 0
+        self.total_errors = 0
+        
+    def add_model(self, name, backend, labels, preprocessor, max_batch_size=None):
+        """Enregistre un modèle (avant start); le prétraitement est partagé par spécification"""
+        spec = preprocessor.spec
+        self.preprocessors.setdefault(spec, preprocessor)
+        self.models[name] = (backend, labels, spec, max_batch_size)
+        
+    @property
+    def preprocessor(self):
+        """Prétraitement du modèle par défaut (ou du premier modèle)"""
+        name = self.DEFAULT_MODEL if self.DEFAULT_MODEL in self.models else next(iter(self.models))
+        return self.preprocessors[self.models[name][2]]
+        
+    def start(self):
+        """Démarre le thread d'inférence"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='inference-engine', daemon=True)
+        self.thread.start()
+        logger.info(f"Moteur d'inférence démarré ({len(self.models)} modèles, "
+                    f"{len(self.preprocessors)} prétraitements, batch max {self.max_batch_size}, "
+                    f"attente max {self.max_wait * 1000:.0f} ms)")
+        
+    def stop(self, timeout=5):
+        """Arrête le thread d'inférence et annule les requêtes en attente"""
+        self.running = False
+        self.requests.put(None)
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            
+        while True:
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                request[2].cancel()
+                
+    def submit(self, frame, models=None):
+        """
+        Soumet une frame BGR et retourne un Future: (predicted_class, confidence) pour le modèle
+        par défaut, ou {nom: (predicted_class, confidence)} pour la liste de modèles demandée
+        """
+        future = Future()
+        if not self.running:
+            future.set_exception(RuntimeError("Moteur d'inférence arrêté"))
+            return future
+        names = tuple(models) if models is not None else None
+        try:
+            specs = {self.models[name][2] for name in (names or (self.DEFAULT_MODEL,))}
+        except KeyError as e:
+            future.set_exception(KeyError(f"Modèle non chargé: {e}"))
+            return future
+        # Redimensionnement dans le thread appelant (en parallèle entre caméras), une fois par spécification
+        resized = {spec: self.preprocessors[spec].resize(frame) for spec in specs}
+        self.requests.put((resized, names, future, time.perf_counter()))
+        return future
+        
+    def _collect_batch(self):
+        """Attend une première requête puis complète le batch jusqu'à la taille ou au délai max"""
+        first = self.requests.get()
+        if first is None:
+            return []
+            
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self.running = False
+                break
+            batch.append(request)
+            
+        return batch
+        
+    def _infer(self, batch):
+        """Une passe par spécification (tenseur partagé), puis une passe par modèle sur ses lignes"""
+        import torch
+        outputs = [{} for _ in batch]
+        
+        for spec, preprocessor in self.preprocessors.items():
+            rows = [i for i, request in enumerate(batch) if spec in request[0]]
+            if not rows:
+                continue
+            pixel_values = preprocessor.normalize([batch[i][0][spec] for i in rows])
+            
+            for name, (backend, labels, model_spec, max_batch_size) in self.models.items():
+                if model_spec != spec:
+                    continue
+                positions = [position for position, i in enumerate(rows)
+                             if name in (batch[i][1] or (self.DEFAULT_MODEL,))]
+                if not positions:
+                    continue
+                inputs = pixel_values if len(positions) == len(rows) else pixel_values[positions]
+                
+                # Modèle à batch limité: plusieurs passes
+                with torch.no_grad():
+                    logits = torch.cat([backend(chunk) for chunk in inputs.split(max_batch_size or len(inputs))])
+                    probabilities = torch.nn.functional.softmax(logits, dim=-1)
+                confidences, indices = probabilities.max(dim=-1)
+                
+                for position, idx, confidence in zip(positions, indices.tolist(), confidences.tolist()):
+                    outputs[rows[position]][name] = (labels[idx], confidence)
+                    
+        return outputs
+        
+    def _run(self):
+        """Boucle principale: regroupe les requêtes et exécute une passe par batch"""
+        import torch
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+            
+        while self.running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+                
+            # Ignorer les requêtes annulées entre-temps
+            batch = [request for request in batch if request[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+                
+            try:
+                outputs = self._infer(batch)
+                for (_, names, future, _), output in zip(batch, outputs):
+                    future.set_result(output if names is not None else output[self.DEFAULT_MODEL])
+                    
+            except Exception as e:
+                logger.error(f"Erreur inférence batch: {e}")
+                for _, _, future, _ in batch:
+                    future.set_exception(e)
+                with self.stats_lock:
+                    self.total_errors += len(batch)
+                continue
+                
+            now = time.perf_counter()
+            with self.stats_lock:
+                self.total_batches += 1
+                self.total_requests += len(batch)
+                self.latencies.extend(now - submitted for _, _, _, submitted in batch)
+                
+    def get_stats(self):
+        """Retourne les statistiques de débit et de latence (ms)"""
+        with self.stats_lock:
+            latencies = sorted(self.latencies)
+            total_requests = self.total_requests
+            total_batches = self.total_batches
+            total_errors = self.total_errors
+            
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+            
+        return {
+            'requests': total_requests,
+            'batches': total_batches,
+            'errors': total_errors,
+            'avg_batch_size': total_requests / total_batches if total_batches else 0.0,
+            'queue_size': self.requests.qsize(),
+            'latency_p50_ms': percentile(0.50),
+            'latency_p95_ms': percentile(0.95),
+            'latency_max_ms': latencies[-1] * 1000 if latencies else 0.0
+        }
+
+class FFmpegCapture:
+    """
+    Capture via un processus ffmpeg (décodage logiciel) avec redimensionnement côté décodeur
+    et mode images clés seules; expose le sous-ensemble de cv2.VideoCapture utilisé ici.
+    """
+    
+    def __init__(self, source, width=0, keyframes_only=False, rtsp_transport='tcp'):
+        self.source = source
+        self.process = None
+        self.frame_shape = None
+        self.fps = 0.0
+        
+        ffmpeg = shutil.which('ffmpeg')
+        size = self._probe(source, rtsp_transport)
+        if ffmpeg is None or size is None:
+            logger.error(f"ffmpeg/ffprobe indisponible ou flux illisible: {self._redact(source)}")
+            return
+            
+        source_width, source_height = size
+        if width and width < source_width:
+            # Hauteur paire proportionnelle, comme scale=W:-2
+            height = max(2, int(round(source_height * width / source_width / 2)) * 2)
+        else:
+            width, height = source_width, source_height
+        self.frame_shape = (height, width, 3)
+        
+        command = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-nostdin']
+        if source.startswith('rtsp://'):
+            command += ['-rtsp_transport', rtsp_transport]
+        if keyframes_only:
+            # Le décodeur ignore toutes les frames sauf les images clés
+            command += ['-skip_frame', 'nokey']
+        command += ['-i', source, '-an', '-sn', '-vf', f'scale={width}:{height}',
+                    '-vsync', 'passthrough', '-pix_fmt', 'bgr24', '-f', 'rawvideo', 'pipe:1']
+        try:
+            self.process = subprocess.Popen(command, stdout=subprocess.PIPE, bufsize=0)
+        except OSError as e:
+            logger.error(f"Impossible de lancer ffmpeg: {e}")
+            
+    @staticmethod
+    def _redact(source):
+        """Masque les identifiants d'une URL RTSP pour les logs"""
+        if '@' in source and '://' in source:
+            scheme, rest = source.split('://', 1)
+            return f"{scheme}://***@{rest.rsplit('@', 1)[1]}"
+        return source
+        
+    def _probe(self, source, rtsp_transport):
+        """Résolution (largeur, hauteur) et fréquence du premier flux vidéo"""
+        ffprobe = shutil.which('ffprobe')
+        if ffprobe is None:
+            return None
+        command = [ffprobe, '-v', 'error', '-select_streams', 'v:0',
+                   '-show_entries', 'stream=width,height,avg_frame_rate', '-of', 'csv=p=0']
+        if source.startswith('rtsp://'):
+            command += ['-rtsp_transport', rtsp_transport]
+        try:
+            output = subprocess.run(command + [source], capture_output=True, text=True, timeout=15).stdout
+            width, height, rate = output.strip().splitlines()[0].split(',')[:3]
+            numerator, _, denominator = rate.partition('/')
+            self.fps = float(numerator) / float(denominator or 1) if float(denominator or 1) else 0.0
+            return int(width), int(height)
+        except (subprocess.SubprocessError, ValueError, IndexError, ZeroDivisionError):
+            return None
+            
+    def isOpened(self):
+        return self.process is not None and self.process.poll() is None
+        
+    def read(self, image=None):
+        """Lit la frame suivante, directement dans image si sa forme correspond"""
+        if self.process is None:
+            return False, None
+        if image is None or image.shape != self.frame_shape or not image.flags['C_CONTIGUOUS']:
+            image = np.empty(self.frame_shape, dtype=np.uint8)
+        view = memoryview(image).cast('B')
+        received = 0
+        while received < len(view):
+            count = self.process.stdout.readinto(view[received:])
+            if not count:
+                return False, None
+            received += count
+        return True, image
+        
+    def grab(self):
+        return self.read()[0]
+        
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.frame_shape[1]) if self.frame_shape else 0.0
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.frame_shape[0]) if self.frame_shape else 0.0
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0.0
+        
+    def set(self, prop, value):
+        return False
+        
+    def release(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process.stdout.close()
+            self.process = None
+
+def gstreamer_pipeline(source, width=0, keyframes_only=False, buffer_size=1):
+    """Pipeline GStreamer (décodage logiciel) vers appsink BGR pour cv2.CAP_GSTREAMER"""
+    if source.startswith('rtsp://'):
+        head = f'rtspsrc location="{source}" protocols=tcp latency=200'
+    else:
+        head = f'filesrc location="{source}"'
+    # Filtrage des images non clés avant le décodeur (GStreamer >= 1.20)
+    keyframes = ' ! identity drop-buffer-flags=delta-unit' if keyframes_only else ''
+    scale = f' ! videoscale ! video/x-raw,width={width},pixel-aspect-ratio=1/1' if width else ''
+    return (f'{head} ! parsebin{keyframes} ! decodebin ! videoconvert{scale} ! video/x-raw,format=BGR'
+            f' ! appsink drop=true max-buffers={max(1, buffer_size)} sync=false')
+
+def open_capture(source, backend='opencv', width=0, keyframes_only=False, buffer_size=1):
+    """
+    Ouvre un flux (URL RTSP ou fichier local) avec le backend choisi:
+    'opencv' (cv2.VideoCapture/FFmpeg), 'ffmpeg' (processus ffmpeg) ou 'gstreamer'.
+    Retourne un objet compatible cv2.VideoCapture (read, grab, isOpened, release).
+    """
+    if backend == 'ffmpeg':
+        return FFmpegCapture(source, width, keyframes_only)
+        
+    if backend == 'gstreamer':
+        cap = cv2.VideoCapture(gstreamer_pipeline(source, width, keyframes_only, buffer_size), cv2.CAP_GSTREAMER)
+        if cap.isOpened():
+            return cap
+        logger.warning("Pipeline GStreamer indisponible (OpenCV sans GStreamer ?), repli sur OpenCV")
+        
+    if width or keyframes_only:
+        logger.warning("Réduction côté décodeur et images clés seules non supportées par le backend opencv")
+    cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+    if buffer_size:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+    return cap
+
+class FrameGrabber:
+    """Thread de décodage continu d'un flux caméra dans un tampon circulaire préalloué"""
+    
+    def __init__(self, cap, camera_id, buffer_size=3, max_read_errors=5):
+        self.cap = cap
+        self.camera_id = camera_id
+        # Erreurs de lecture consécutives avant d'abandonner le flux (coupé ou terminé)
+        self.max_read_errors = max(1, int(max_read_errors))
+        # Au moins 3 cases: une en lecture par l'analyse, la dernière publiée, une en écriture
+        self.buffer_size = max(3, int(buffer_size))
+        self.buffers = [None] * self.buffer_size
+        
+        self.condition = threading.Condition()
+        self.latest_slot = None
+        self.latest_seq = 0
+        self.reading_slot = None
+        self.consumed_seq = 0
+        
+        self.running = False
+        self.thread = None
+        
+        # Compteurs exposés par caméra
+        self.decoded_frames = 0
+        self.dropped_frames = 0
+        self.read_errors = 0
+        self.consecutive_errors = 0
+        self.last_frame_time = None
+        self.started = None
+        
+    def start(self):
+        """Démarre le thread de décodage"""
+        self.running = True
+        self.started = time.time()
+        self.thread = threading.Thread(
+            target=self._run,
+            name=f'grabber-{self.camera_id}',
+            daemon=True
+        )
+        self.thread.start()
+        
+    def stop(self, timeout=5):
+        """Arrête le thread de décodage"""
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+        
+    def stalled(self, timeout):
+        """Vrai si aucune frame n'a été décodée depuis timeout secondes (lecture bloquée)"""
+        last = self.last_frame_time or self.started
+        return timeout > 0 and last is not None and time.time() - last > timeout
+        
+    def _next_slot(self):
+        """Choisit une case libre (ni en lecture, ni la dernière publiée)"""
+        for offset in range(1, self.buffer_size + 1):
+            slot = ((self.latest_slot if self.latest_slot is not None else -1) + offset) % self.buffer_size
+            if slot != self.reading_slot and slot != self.latest_slot:
+                return slot
+        return None
+        
+    def _decode(self, slot):
+        """Décode une frame directement dans la case (une seule copie depuis le décodeur)"""
+        buffer = self.buffers[slot]
+        ret, frame = self.cap.read(buffer) if buffer is not None else self.cap.read()
+        if ret and frame is not None:
+            self.buffers[slot] = frame
+        return ret and frame is not None
+        
+    def _run(self):
+        """Décode les frames au rythme du flux, en écrasant les plus anciennes"""
+        while self.running:
+            with self.condition:
+                slot = self._next_slot()
+                
+            # Décodage directement dans la case préallouée (hors verrou)
+            if not self._decode(slot):
+                self.read_errors += 1
+                self.consecutive_errors += 1
+                if self.consecutive_errors >= self.max_read_errors:
+                    logger.error(f"Flux caméra {self.camera_id} abandonné après "
+                                 f"{self.consecutive_errors} erreurs de lecture")
+                    break
+                logger.warning(f"Impossible de lire la frame caméra {self.camera_id}")
+                time.sleep(1)
+                continue
+                
+            self.consecutive_errors = 0
+                
+            with self.condition:
+                self.latest_slot = slot
+                self.latest_seq += 1
+                self.decoded_frames += 1
+                self.last_frame_time = time.time()
+                self.condition.notify_all()
+                
+        # Réveiller le lecteur: le flux est terminé
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+                
+    def latest(self, timeout=1.0):
+        """
+        Retourne (seq, frame) pour la frame la plus récente non encore consommée,
+        ou (None, None) si aucune nouvelle frame n'arrive avant le délai.
+        La frame reste valide jusqu'au prochain appel (lecteur unique).
+        """
+        with self.condition:
+            if self.latest_seq <= self.consumed_seq:
+                self.condition.wait_for(
+                    lambda: self.latest_seq > self.consumed_seq or not self.running,
+                    timeout=timeout
+                )
+            if self.latest_seq <= self.consumed_seq:
+                return None, None
+                
+            # Les frames décodées entre deux lectures sont perdues
+            self.dropped_frames += self.latest_seq - self.consumed_seq - 1
+            self.consumed_seq = self.latest_seq
+            self.reading_slot = self.latest_slot
+            return self.latest_seq, self.buffers[self.reading_slot]
+            
+    def get_stats(self):
+        """Retourne les compteurs de décodage de la caméra"""
+        with self.condition:
+            return {
+                'decoded_frames': self.decoded_frames,
+                'dropped_frames': self.dropped_frames,
+                'read_errors': self.read_errors,
+                'last_frame_time': self.last_frame_time,
+                'alive': self.is_alive()
+            }
+
+class ConnectionPool:
+    """Pool de connexions MariaDB persistantes avec vérification de santé et reconnexion"""
+    
+    def __init__(self, db_config, size=5, timeout=5.0, health_check_interval=30.0):
+        self.db_config = db_config
+        self.size = max(1, int(size))
+        self.timeout = float(timeout)
+        self.health_check_interval = float(health_check_interval)
+        
+        # Connexions libres: (connexion, date de dernière utilisation)
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.created = 0
+        self.closed = False
+        
+    def _create(self):
+        """Ouvre une nouvelle connexion (la place est déjà réservée dans le pool)"""
+        try:
+            return mysql.connector.connect(**self.db_config)
+        except Error:
+            with self.lock:
+                self.created -= 1
+            raise
+            
+    def _discard(self, connection):
+        """Ferme une connexion défectueuse et libère sa place"""
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self.lock:
+            self.created -= 1
+            
+    def _acquire(self):
+        """Récupère une connexion libre, en crée une ou attend qu'une se libère"""
+        if self.closed:
+            raise PoolError("Pool de connexions fermé")
+            
+        try:
+            connection, last_used = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                can_create = self.created < self.size
+                if can_create:
+                    self.created += 1
+            if can_create:
+                return self._create()
+            try:
+                connection, last_used = self.idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise PoolError(f"Pool de connexions épuisé ({self.size} connexions)")
+                
+        # Vérification de santé des connexions restées inactives
+        if time.monotonic() - last_used > self.health_check_interval:
+            try:
+                connection.ping(reconnect=True, attempts=3, delay=1)
+            except Error as e:
+                logger.warning(f"Connexion base de données perdue, reconnexion: {e}")
+                self._discard(connection)
+                with self.lock:
+                    self.created += 1
+                return self._create()
+                
+        return connection
+        
+    def _release(self, connection):
+        """Remet la connexion dans le pool, ou la ferme si elle est inutilisable"""
+        try:
+            # Ne jamais laisser une transaction (ou un snapshot de lecture) ouverte
+            if connection.in_transaction:
+                connection.rollback()
+        except Error:
+            self._discard(connection)
+            return
+            
+        if self.closed or not connection.is_connected():
+            self._discard(connection)
+        else:
+            self.idle.put((connection, time.monotonic()))
+            
+    @contextmanager
+    def connection(self):
+        """Fournit une connexion du pool pour la durée du bloc with"""
+        connection = self._acquire()
+        try:
+            yield connection
+        finally:
+            self._release(connection)
+            
+    def close(self):
+        """Ferme toutes les connexions libres"""
+        self.closed = True
+        while True:
+            try:
+                connection, _ = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(connection)
+
+class ResultWriter:
+    """Écriture différée (write-behind) des résultats d'analyse par lots multi-lignes"""
+    
+    def __init__(self, db_pool, batch_size=100, flush_interval=1.0, max_queue_size=10000, metrics=None,
+                 image_timeout=10.0):
+        self.db_pool = db_pool
+        self.metrics = metrics or Metrics(enabled=False)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        # Attente maximale de l'écriture d'une image avant d'enregistrer sa ligne sans URI
+        self.image_timeout = float(image_timeout)
+        
+        # File bornée: les caméras ne bloquent jamais, l'excédent est compté et rejeté
+        self.pending = queue.Queue(maxsize=max(1, int(max_queue_size)))
+        self.running = False
+        self.thread = None
+        
+        self.stats_lock = threading.Lock()
+        self.written_images = 0
+        self.written_results = 0
+        self.flushes = 0
+        self.dropped = 0
+        self.failed = 0
+        self.skipped = 0
+        self.last_drop_log = 0
+        
+    def start(self):
+        """Démarre le thread d'écriture"""
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='result-writer', daemon=True)
+        self.thread.start()
+        
+    def submit(self, image_date, image_path, results):
+        """
+        Met en file une image et ses résultats [(fk_analyse, result, date), ...].
+        image_path est un chemin ou le Future retourné par ImageWriter.submit.
+        Retourne False si la file est pleine (backpressure: l'entrée est rejetée).
+        """
+        try:
+            self.pending.put_nowait((image_date, image_path, results))
+            return True
+        except queue.Full:
+            with self.stats_lock:
+                self.dropped += 1
+                dropped = self.dropped
+            # Limiter le bruit dans les logs quand la base décroche
+            now = time.monotonic()
+            if now - self.last_drop_log > 10:
+                self.last_drop_log = now
+                logger.warning(f"File d'écriture pleine, {dropped} résultats rejetés au total")
+            return False
+            
+    def _run(self):
+        """Regroupe les entrées jusqu'à la taille de lot ou l'intervalle de flush"""
+        while self.running or not self.pending.empty():
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or (not self.running and self.pending.empty()):
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=min(remaining, 0.5)))
+                except queue.Empty:
+                    continue
+                    
+            if batch:
+                self._flush(batch)
+                
+    def image_uri(self, image_path):
+        """URI de l'image écrite, ou '' si elle a été rejetée ou n'a pas été écrite à temps"""
+        if not isinstance(image_path, Future):
+            return image_path or ''
+        try:
+            return image_path.result(timeout=self.image_timeout) or ''
+        except Exception:
+            logger.warning("Image non écrite à temps, résultat enregistré sans URI")
+            return ''
+            
+    def _flush(self, batch, attempts=2):
+        """Écrit un lot d'images et de résultats dans une seule transaction"""
+        # Image rejetée ou non écrite: pas de ligne image à URI vide (resultat_analyse.fk_image
+        # est obligatoire, ses résultats sont donc abandonnés et comptés)
+        written = []
+        for image_date, image_path, results in batch:
+            uri = self.image_uri(image_path)
+            if uri:
+                written.append((image_date, uri, results))
+            else:
+                logger.warning(f"Image du {image_date} non écrite, {len(results)} résultat(s) non sauvegardé(s)")
+                with self.stats_lock:
+                    self.skipped += 1
+        batch = written
+        if not batch:
+            return True
+            
+        for attempt in range(attempts):
+            try:
+                with self.metrics.timer('db_write_seconds'), self.db_pool.connection() as connection:
+                    cursor = connection.cursor()
+                    connection.start_transaction()
+                    
+                    # Une ligne image à la fois: son id est lu sur lastrowid. Les ids d'un INSERT
+                    # multi-lignes ne sont pas garantis consécutifs (innodb_autoinc_lock_mode=2 avec
+                    # plusieurs écrivains, auto_increment_increment > 1 en réplication)
+                    rows = []
+                    for image_date, image_path, results in batch:
+                        cursor.execute("""
+                            INSERT INTO image (Date, URI)
+                            VALUES (%s, %s)
+                        """, (image_date, image_path))
+                        image_id = cursor.lastrowid
+                        for fk_analyse, result_level, result_date in results:
+                            rows.append((
+                                image_id,
+                                fk_analyse,
+                                result_level,
+                                False,  # Pas encore vérifié par un humain
+                                False,  # Pas encore résolu
+                                result_date
+                            ))
+                            
+                    if rows:
+                        cursor.executemany("""
+                            INSERT INTO resultat_analyse (fk_image, fk_analyse, result, human_verification, 
+                                                       is_resolved, date)
+                            VALUES (%s, %s, %s, %s, %s, %s)
+                        """, rows)
+                        
+                    connection.commit()
+                    cursor.close()
+                    
+                with self.stats_lock:
+                    self.flushes += 1
+                    self.written_images += len(batch)
+                    self.written_results += len(rows)
+                logger.info(f"{len(batch)} images et {len(rows)} résultats d'analyse sauvegardés")
+                return True
+                
+            except Error as e:
+                logger.error(f"Erreur sauvegarde lot d'analyses (tentative {attempt + 1}/{attempts}): {e}")
+                
+        with self.stats_lock:
+            self.failed += len(batch)
+        return False
+        
+    def stop(self, timeout=10):
+        """Arrête le thread après avoir vidé la file"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            
+    def get_stats(self):
+        """Retourne les compteurs d'écriture"""
+        with self.stats_lock:
+            return {
+                'queue_size': self.pending.qsize(),
+                'written_images': self.written_images,
+                'written_results': self.written_results,
+                'flushes': self.flushes,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'skipped': self.skipped
+            }
+
+class MotionDetector:
+    """Détection de mouvement MOG2 sur une frame réduite en niveaux de gris"""
+    
+    def __init__(self, width=320, threshold=0.01, frame_skip=0, region_mask=None, detect_shadows=True):
+        # width = 0: pas de réduction (résolution d'origine)
+        self.width = int(width)
+        self.threshold = float(threshold)
+        self.frame_skip = max(0, int(frame_skip))
+        self.region_mask = region_mask
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=detect_shadows)
+        
+        # Tampons préalloués au premier appel (dépendent de la taille du flux)
+        self.source_shape = None
+        self.size = None
+        self.small = None
+        self.gray = None
+        self.mask = None
+        self.mask_pixels = 0
+        
+        self.frame_index = 0
+        self.last_result = (False, 0.0)
+        self.fg_mask = None
+        # Index de la frame dont proviennent gray et fg_mask (frames sautées: plus anciens)
+        self.mask_index = 0
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        
+    def _prepare(self, frame):
+        """Calcule la taille réduite et prépare les tampons et le masque de zone"""
+        height, width = frame.shape[:2]
+        if self.width and width > self.width:
+            self.size = (self.width, max(1, round(height * self.width / width)))
+        else:
+            self.size = (width, height)
+            
+        self.source_shape = frame.shape
+        self.small = np.empty((self.size[1], self.size[0], 3), dtype=np.uint8)
+        self.gray = np.empty((self.size[1], self.size[0]), dtype=np.uint8)
+        
+        if self.region_mask is not None:
+            mask = cv2.resize(self.region_mask, self.size, interpolation=cv2.INTER_NEAREST)
+            self.mask = np.where(mask > 0, 255, 0).astype(np.uint8)
+            self.mask_pixels = cv2.countNonZero(self.mask)
+        else:
+            self.mask = None
+            self.mask_pixels = self.size[0] * self.size[1]
+            
+    def set_region_mask(self, region_mask):
+        """Change le masque de zone surveillée (pixels non nuls = surveillés)"""
+        self.region_mask = region_mask
+        self.source_shape = None
+        
+    def apply(self, frame):
+        """Retourne (mouvement détecté, proportion de pixels en mouvement)"""
+        self.frame_index += 1
+        if self.frame_skip and (self.frame_index - 1) % (self.frame_skip + 1):
+            return self.last_result
+            
+        if frame.shape != self.source_shape:
+            self._prepare(frame)
+            
+        if self.size != (frame.shape[1], frame.shape[0]):
+            cv2.resize(frame, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        else:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray)
+            
+        fg_mask = self.subtractor.apply(self.gray)
+        if self.mask is not None:
+            cv2.bitwise_and(fg_mask, self.mask, dst=fg_mask)
+        self.fg_mask = fg_mask
+        self.mask_index = self.frame_index
+            
+        ratio = cv2.countNonZero(fg_mask) / self.mask_pixels if self.mask_pixels else 0.0
+        self.last_result = (ratio > self.threshold, ratio)
+        return self.last_result
+        
+    @property
+    def current(self):
+        """Vrai si gray et fg_mask proviennent de la dernière frame reçue (pas d'une frame sautée)"""
+        return self.fg_mask is not None and self.mask_index == self.frame_index
+        
+    def motion_boxes(self, top_k=3, min_area=0.002, padding=0.25):
+        """
+        Boîtes carrées (x, y, côté) des K plus grandes zones en mouvement de la dernière frame,
+        en coordonnées de la frame d'origine. Les zones plus petites que min_area (fraction
+        de la zone surveillée) sont ignorées. None si aucune détection n'a encore eu lieu
+        ou si la dernière frame a été sautée (masque d'une frame plus ancienne).
+        """
+        if not self.current:
+            return None
+            
+        # Ombres MOG2 (127) exclues, zones voisines fusionnées par dilatation
+        _, binary = cv2.threshold(self.fg_mask, 200, 255, cv2.THRESH_BINARY)
+        binary = cv2.dilate(binary, self.kernel, iterations=2)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        
+        min_pixels = min_area * self.mask_pixels
+        components = [stats[i] for i in range(1, count) if stats[i, cv2.CC_STAT_AREA] >= min_pixels]
+        components.sort(key=lambda stat: stat[cv2.CC_STAT_AREA], reverse=True)
+        
+        frame_height, frame_width = self.source_shape[:2]
+        scale_x = frame_width / self.size[0]
+        scale_y = frame_height / self.size[1]
+        boxes = []
+        for x, y, w, h, _ in components[:top_k]:
+            # Carré centré sur la zone (entrée carrée du modèle), élargi pour garder du contexte
+            side = int(max(w * scale_x, h * scale_y) * (1 + padding))
+            side = min(side, frame_width, frame_height)
+            center_x = (x + w / 2) * scale_x
+            center_y = (y + h / 2) * scale_y
+            left = int(min(max(0, center_x - side / 2), frame_width - side))
+            top = int(min(max(0, center_y - side / 2), frame_height - side))
+            boxes.append((left, top, side))
+        return boxes
+
+class FireDetector:
+    """
+    Détection de feu par couleur sur une frame réduite: une seule passe de table de
+    correspondance HSV fusionne les deux plages de teinte. Par caméra, les pixels rouges/orange
+    présents en permanence (objets fixes) sont appris et ignorés, et seul un feu qui scintille
+    d'une observation à l'autre est retenu.
+    """
+    
+    def __init__(self, width=320, threshold=0.05, hue_ranges=((0, 10), (170, 180)), min_saturation=50,
+                 min_value=50, min_flicker=0.1, static_alpha=0.1, static_level=0.8, max_gap=300.0):
+        # width = 0: pas de réduction (résolution d'origine)
+        self.width = int(width)
+        self.threshold = float(threshold)
+        # Part minimale des pixels de feu qui changent entre deux observations
+        self.min_flicker = float(min_flicker)
+        # Moyenne exponentielle de présence par pixel: au-delà de static_level, objet fixe
+        self.static_alpha = float(static_alpha)
+        self.static_level = float(static_level)
+        # Au-delà, l'observation précédente est trop ancienne pour mesurer le scintillement
+        self.max_gap = float(max_gap)
+        
+        # Table 3 canaux: 255 si la teinte, la saturation et la valeur sont dans les plages
+        table = np.zeros((256, 1, 3), dtype=np.uint8)
+        for low, high in hue_ranges:
+            table[low:high + 1, 0, 0] = 255
+        table[min_saturation:, 0, 1] = 255
+        table[min_value:, 0, 2] = 255
+        self.table = table
+        
+        self.lock = threading.Lock()
+        # camera_id -> {'previous': masque, 'persistence': présence moyenne par pixel (0-255), 'time'}
+        self.states = {}
+        
+    def _reduce(self, frame):
+        height, width = frame.shape[:2]
+        if not self.width or width <= self.width:
+            return frame
+        size = (self.width, max(1, int(round(height * self.width / width))))
+        # Échantillonnage sans mélange: garde les vraies couleurs (pas de teintes intermédiaires)
+        return cv2.resize(frame, size, interpolation=cv2.INTER_NEAREST)
+        
+    def fire_mask(self, frame):
+        """Masque 0/255 des pixels couleur feu d'une frame BGR (déjà réduite)"""
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        cv2.LUT(hsv, self.table, dst=hsv)
+        return cv2.inRange(hsv, (255, 255, 255), (255, 255, 255))
+        
+    def detect_many(self, frames, now=None):
+        """
+        Analyse plusieurs frames (camera_id, frame BGR) en un appel: les frames réduites de même
+        largeur sont empilées pour une seule conversion HSV et une seule passe de table.
+        camera_id None: pas de suivi temporel (décision sur la seule couleur).
+        """
+        now = time.time() if now is None else now
+        reduced = [self._reduce(frame) for _, frame in frames]
+        if len({image.shape[1] for image in reduced}) == 1 and len(reduced) > 1:
+            stacked = self.fire_mask(np.vstack(reduced))
+            masks, offset = [], 0
+            for image in reduced:
+                masks.append(stacked[offset:offset + image.shape[0]])
+                offset += image.shape[0]
+        else:
+            masks = [self.fire_mask(image) for image in reduced]
+        return [self._update(camera_id, mask, now) for (camera_id, _), mask in zip(frames, masks)]
+        
+    def detect(self, frame, camera_id=None, now=None):
+        return self.detect_many([(camera_id, frame)], now)[0]
+        
+    def _update(self, camera_id, mask, now):
+        pixels = mask.size
+        fire_pixels = cv2.countNonZero(mask)
+        fire_ratio = fire_pixels / pixels
+        
+        if camera_id is None:
+            return {'fire_ratio': fire_ratio, 'active_ratio': fire_ratio, 'static_ratio': 0.0,
+                    'flicker': None, 'is_fire': fire_ratio > self.threshold}
+            
+        with self.lock:
+            state = self.states.get(camera_id)
+            if state is None or state['previous'].shape != mask.shape:
+                state = {'previous': None, 'persistence': np.zeros(mask.shape, dtype=np.float32), 'time': 0.0}
+                self.states[camera_id] = state
+                
+            # Pixels couleur feu en dehors des objets fixes appris
+            static = (state['persistence'] > self.static_level * 255).astype(np.uint8) * 255
+            active = cv2.bitwise_and(mask, cv2.bitwise_not(static))
+            active_ratio = cv2.countNonZero(active) / pixels
+            
+            # Scintillement: part des pixels de feu qui ont changé depuis l'observation précédente
+            flicker = None
+            previous = state['previous']
+            if previous is not None and now - state['time'] <= self.max_gap:
+                union = cv2.countNonZero(cv2.bitwise_or(mask, previous))
+                if union:
+                    flicker = cv2.countNonZero(cv2.bitwise_xor(mask, previous)) / union
+                    
+            # Seules les observations sans scintillement apprennent les objets fixes: un feu en
+            # cours ne doit pas être absorbé (ses pixels sont gelés, le reste continue d'oublier)
+            if flicker is not None and flicker >= self.min_flicker:
+                cv2.accumulateWeighted(mask, state['persistence'], self.static_alpha, cv2.bitwise_not(mask))
+            else:
+                cv2.accumulateWeighted(mask, state['persistence'], self.static_alpha)
+            state['previous'] = mask.copy()
+            state['time'] = now
+            
+        return {
+            'fire_ratio': fire_ratio,
+            'active_ratio': active_ratio,
+            'static_ratio': cv2.countNonZero(static) / pixels,
+            'flicker': flicker,
+            # Sans observation précédente, le scintillement est inconnu: pas d'alerte
+            'is_fire': active_ratio > self.threshold and flicker is not None and flicker >= self.min_flicker
+        }
+        
+    def forget(self, camera_id):
+        with self.lock:
+            self.states.pop(camera_id, None)
+
+class AlertAggregator:
+    """
+    Agrégation temporelle des résultats par caméra et par analyse: une alerte n'est levée
+    que lorsque Nbr_positive_necessary positifs tombent dans la fenêtre glissante.
+    """
+    
+    IDLE = 'idle'
+    ALERT = 'alert'
+    
+    def __init__(self, window_seconds=30.0, decay_seconds=60.0, snapshot_interval=60.0):
+        self.window = float(window_seconds)
+        self.decay = float(decay_seconds)
+        self.snapshot_interval = float(snapshot_interval)
+        self.lock = threading.Lock()
+        # (camera_id, analysis_type) -> état de la machine
+        self.states = {}
+        
+    def update(self, camera_id, analysis_type, is_positive, required, now=None):
+        """
+        Met à jour l'état et retourne l'événement à persister:
+        'raise' (seuil franchi), 'snapshot' (alerte en cours, image périodique),
+        'clear' (fin d'alerte) ou None.
+        """
+        now = time.time() if now is None else now
+        required = max(1, int(required or 1))
+        
+        with self.lock:
+            state = self.states.get((camera_id, analysis_type))
+            if state is None:
+                state = {'state': self.IDLE, 'positives': deque(), 'last_positive': 0.0, 'last_saved': 0.0}
+                self.states[(camera_id, analysis_type)] = state
+                
+            positives = state['positives']
+            # Alerte sans positif depuis decay secondes: retour au repos avant de compter ce résultat
+            cleared = state['state'] == self.ALERT and now - state['last_positive'] > self.decay
+            if cleared:
+                state['state'] = self.IDLE
+                positives.clear()
+                
+            if is_positive:
+                positives.append(now)
+                state['last_positive'] = now
+            # Les positifs sortis de la fenêtre ne comptent plus
+            while positives and now - positives[0] > self.window:
+                positives.popleft()
+                
+            if state['state'] == self.IDLE:
+                if len(positives) >= required:
+                    state['state'] = self.ALERT
+                    state['last_saved'] = now
+                    return 'raise'
+                return 'clear' if cleared else None
+                
+            if is_positive and now - state['last_saved'] >= self.snapshot_interval:
+                state['last_saved'] = now
+                return 'snapshot'
+            return None
+            
+    def forget(self, camera_id):
+        """Oublie l'état d'une caméra arrêtée"""
+        with self.lock:
+            for key in [key for key in self.states if key[0] == camera_id]:
+                del self.states[key]
+                
+    def active_alerts(self):
+        """Liste des couples (caméra, analyse) en alerte"""
+        with self.lock:
+            return [key for key, state in self.states.items() if state['state'] == self.ALERT]
+
+class AnalysisScheduler:
+    """
+    Ordonnanceur global des analyses: la fréquence de chaque (caméra, analyse) part de la
+    fréquence de base, accélérée sur les caméras actives (mouvement, positifs récents) et
+    ralentie sur les caméras calmes, puis l'ensemble est ramené au budget global (frames/s).
+    """
+    
+    def __init__(self, budget_fps=0.0, min_scale=0.5, max_scale=3.0, motion_threshold=0.01,
+                 motion_tau=5.0, hot_seconds=60.0, rebalance_interval=1.0, stale_seconds=10.0):
+        # Budget global d'analyses par seconde, toutes caméras confondues (0 = illimité)
+        self.budget = float(budget_fps)
+        self.min_scale = float(min_scale)
+        self.max_scale = float(max_scale)
+        self.motion_threshold = float(motion_threshold)
+        self.motion_tau = float(motion_tau)
+        self.hot_seconds = float(hot_seconds)
+        self.rebalance_interval = float(rebalance_interval)
+        self.stale_seconds = float(stale_seconds)
+        
+        self.lock = threading.Lock()
+        # camera_id -> {'motion': moyenne glissante du taux de mouvement, 'seen', 'last_positive'}
+        self.cameras = {}
+        # (camera_id, analysis_type) -> {'base', 'desired', 'granted', 'last_run', 'last_request', 'runs'}
+        self.slots = {}
+        self.budget_factor = 1.0
+        self.next_rebalance = 0.0
+        
+    def _camera(self, camera_id):
+        camera = self.cameras.get(camera_id)
+        if camera is None:
+            camera = {'motion': 0.0, 'seen': None, 'last_positive': None}
+            self.cameras[camera_id] = camera
+        return camera
+        
+    def observe_motion(self, camera_id, motion_ratio, now=None):
+        """Met à jour le niveau de mouvement d'une caméra (moyenne exponentielle sur motion_tau)"""
+        now = time.time() if now is None else now
+        with self.lock:
+            camera = self._camera(camera_id)
+            if camera['seen'] is None:
+                camera['motion'] = motion_ratio
+            else:
+                alpha = 1.0 - np.exp(-max(0.0, now - camera['seen']) / self.motion_tau) if self.motion_tau > 0 else 1.0
+                camera['motion'] += alpha * (motion_ratio - camera['motion'])
+            camera['seen'] = now
+            
+    def record_result(self, camera_id, is_positive, now=None):
+        """Un résultat positif rend la caméra prioritaire pendant hot_seconds"""
+        if is_positive:
+            with self.lock:
+                self._camera(camera_id)['last_positive'] = time.time() if now is None else now
+                
+    def _is_hot(self, camera, now):
+        return camera['last_positive'] is not None and now - camera['last_positive'] <= self.hot_seconds
+        
+    def _scale(self, camera, now):
+        if self._is_hot(camera, now):
+            return self.max_scale
+        if self.motion_threshold <= 0:
+            return 1.0
+        # Calme -> min_scale, mouvement au seuil de détection ou au-delà -> fréquence de base
+        activity = min(1.0, camera['motion'] / self.motion_threshold)
+        return self.min_scale + (1.0 - self.min_scale) * activity
+        
+    def _rebalance(self, now):
+        for key in [key for key, slot in self.slots.items() if now - slot['last_request'] > self.stale_seconds]:
+            del self.slots[key]
+        for camera_id in [cam_id for cam_id, camera in self.cameras.items()
+                          if camera['seen'] is not None and now - camera['seen'] > self.stale_seconds
+                          and not self._is_hot(camera, now)]:
+            del self.cameras[camera_id]
+            
+        total = 0.0
+        for (camera_id, _), slot in self.slots.items():
+            slot['desired'] = slot['base'] * self._scale(self._camera(camera_id), now)
+            total += slot['desired']
+        # Réduction proportionnelle: les caméras actives gardent une part plus grande
+        self.budget_factor = min(1.0, self.budget / total) if self.budget > 0 and total > 0 else 1.0
+        for slot in self.slots.values():
+            slot['granted'] = slot['desired'] * self.budget_factor
+        self.next_rebalance = now + self.rebalance_interval
+        
+    def due(self, camera_id, analysis_type, base_fps, now=None):
+        """Indique si l'analyse doit être effectuée maintenant (et la compte comme effectuée)"""
+        now = time.time() if now is None else now
+        with self.lock:
+            slot = self.slots.get((camera_id, analysis_type))
+            if slot is None:
+                slot = {'base': base_fps, 'desired': base_fps, 'granted': base_fps,
+                        'last_run': 0.0, 'last_request': now, 'runs': 0}
+                self.slots[(camera_id, analysis_type)] = slot
+                self.next_rebalance = 0.0
+            slot['base'] = base_fps
+            slot['last_request'] = now
+            if now >= self.next_rebalance:
+                self._rebalance(now)
+                
+            if slot['granted'] <= 0 or now - slot['last_run'] < 1.0 / slot['granted']:
+                return False
+            slot['last_run'] = now
+            slot['runs'] += 1
+            return True
+            
+    def forget(self, camera_id):
+        """Oublie une caméra arrêtée"""
+        with self.lock:
+            self.cameras.pop(camera_id, None)
+            for key in [key for key in self.slots if key[0] == camera_id]:
+                del self.slots[key]
+            self.next_rebalance = 0.0
+            
+    def get_decisions(self):
+        """Décisions courantes: budget, facteur appliqué et fréquence accordée par caméra et analyse"""
+        now = time.time()
+        with self.lock:
+            cameras = {}
+            for (camera_id, analysis_type), slot in self.slots.items():
+                camera = self._camera(camera_id)
+                entry = cameras.setdefault(camera_id, {
+                    'motion': round(camera['motion'], 4),
+                    'hot': self._is_hot(camera, now),
+                    'scale': round(self._scale(camera, now), 3),
+                    'analyses': {}
+                })
+                entry['analyses'][analysis_type] = {
+                    'base_fps': slot['base'],
+                    'desired_fps': round(slot['desired'], 3),
+                    'granted_fps': round(slot['granted'], 3),
+                    'runs': slot['runs']
+                }
+            return {
+                'budget_fps': self.budget,
+                'demand_fps': round(sum(slot['desired'] for slot in self.slots.values()), 3),
+                'budget_factor': round(self.budget_factor, 3),
+                'cameras': cameras
+            }
+
+class ResultCache:
+    """
+    Cache des classifications par caméra: une frame quasi identique à une frame récemment
+    analysée (vignettes réduites en niveaux de gris dont presque aucune cellule ne diffère
+    de plus du seuil) réutilise son résultat.
+    """
+    
+    def __init__(self, size=32, threshold=10, max_changed=0.01, ttl=10.0, max_entries=4):
+        self.size = (size, size)
+        # Écart d'une cellule de la vignette considéré comme un changement (niveaux de gris 0-255)
+        self.threshold = int(threshold)
+        # Proportion de cellules changées tolérée: un changement local (personne qui entre) compte
+        self.max_changed = int(max_changed * size * size)
+        self.ttl = float(ttl)
+        self.max_entries = max(1, int(max_entries))
+        self.lock = threading.Lock()
+        # (camera_id, analysis_type) -> deque de (instant, signature, résultat)
+        self.entries = {}
+        # camera_id -> {'hits', 'misses'}
+        self.stats = {}
+        
+    def signature(self, frame):
+        """Vignette en niveaux de gris (réduction d'abord: la conversion ne porte que sur la vignette)"""
+        thumbnail = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if thumbnail.ndim == 3:
+            thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+        return thumbnail
+        
+    def lookup(self, camera_id, analysis_type, signature, now=None):
+        """Résultat d'une frame récente assez proche, ou None"""
+        now = time.time() if now is None else now
+        with self.lock:
+            stats = self.stats.setdefault(camera_id, {'hits': 0, 'misses': 0})
+            entries = self.entries.get((camera_id, analysis_type))
+            if entries:
+                while entries and now - entries[0][0] > self.ttl:
+                    entries.popleft()
+                for _, cached_signature, result in reversed(entries):
+                    diff = cv2.absdiff(signature, cached_signature)
+                    if np.count_nonzero(diff > self.threshold) <= self.max_changed:
+                        stats['hits'] += 1
+                        return result
+            stats['misses'] += 1
+            return None
+            
+    def store(self, camera_id, analysis_type, signature, result, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            entries = self.entries.setdefault((camera_id, analysis_type), deque(maxlen=self.max_entries))
+            entries.append((now, signature, result))
+            
+    def forget(self, camera_id):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == camera_id]:
+                del self.entries[key]
+            self.stats.pop(camera_id, None)
+            
+    def get_stats(self, camera_id=None):
+        """Taux de réutilisation par caméra"""
+        with self.lock:
+            stats = {
+                cam_id: {**counts, 'hit_rate': round(counts['hits'] / max(1, counts['hits'] + counts['misses']), 3)}
+                for cam_id, counts in self.stats.items()
+            }
+        return stats.get(camera_id) if camera_id is not None else stats
+
+class AnalysisRegistry:
+    """
+    Registre des analyses chargé depuis la table analyse et mis en cache (TTL).
+    Associe chaque nom à son id, son seuil, sa fréquence, son modèle et son analyse enfichable;
+    le chemin critique ne lit que l'instantané en mémoire.
+    """
+    
+    def __init__(self, db_pool, defaults, plugins, ttl=60.0):
+        self.db_pool = db_pool
+        # Configuration locale (analysis_config): fréquence et modèle de chaque analyse
+        self.defaults = defaults
+        self.plugins = plugins
+        self.ttl = float(ttl)
+        
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.loaded = False
+        self.expires = 0.0
+        self.unsupported = set()
+        
+    def _build_entry(self, name, row):
+        config = self.defaults[name]
+        return {
+            'id': row['id'],
+            'name': name,
+            'required': row['required'] or 1,
+            'fps': config['fps'],
+            'model': config['model'],
+            'run_without_movement': config.get('run_without_movement', False),
+            'plugin': self.plugins[name]
+        }
+        
+    def refresh(self, force=False):
+        """Recharge la table si le TTL est expiré et applique uniquement les changements"""
+        if not force and time.monotonic() < self.expires:
+            return False
+            
+        try:
+            with self.db_pool.connection() as connection:
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute("""
+                    SELECT id, Name as name, Nbr_positive_necessary as required
+                    FROM analyse
+                """)
+                rows = cursor.fetchall()
+                cursor.close()
+        except Error as e:
+            logger.error(f"Erreur chargement des analyses: {e}")
+            # Nouvelle tentative plus tôt que le TTL complet
+            self.expires = time.monotonic() + min(self.ttl, 10)
+            return False
+            
+        entries = dict(self.entries)
+        seen = set()
+        for row in rows:
+            name = (row['name'] or '').strip().lower()
+            if name not in self.defaults or name not in self.plugins:
+                if name and name not in self.unsupported:
+                    self.unsupported.add(name)
+                    logger.warning(f"Analyse '{row['name']}' sans fonction d'analyse, ignorée")
+                continue
+                
+            seen.add(name)
+            entry = self._build_entry(name, row)
+            current = entries.get(name)
+            if current is None:
+                logger.info(f"Analyse ajoutée: {name} (id {entry['id']}, {entry['required']} positifs)")
+            elif (current['id'], current['required']) != (entry['id'], entry['required']):
+                logger.info(f"Analyse modifiée: {name} (id {entry['id']}, {entry['required']} positifs)")
+            else:
+                continue
+            entries[name] = entry
+            
+        for name in set(entries) - seen:
+            logger.info(f"Analyse supprimée: {name}")
+            del entries[name]
+            
+        # Remplacement atomique de l'instantané lu par les caméras
+        with self.lock:
+            self.entries = entries
+            self.loaded = True
+            self.expires = time.monotonic() + self.ttl
+        return True
+        
+    def active(self):
+        """Instantané {nom: entrée} des analyses actives (sans accès base)"""
+        return self.entries
+        
+    def get(self, name):
+        return self.entries.get(name)
+
+class CameraHeartbeat:
+    """
+    Agrégation des statuts caméra en mémoire: les caméras modifiées sont écrites en un seul
+    UPDATE groupé toutes les N secondes, les changements d'état sont écrits immédiatement.
+    Une caméra passée en 'inactive' ou 'maintenance' par un opérateur n'est jamais réécrite.
+    """
+    
+    # Statuts internes -> valeurs de l'ENUM camera.Status
+    DB_STATUS = {'connected': 'active'}
+    
+    def __init__(self, db_pool, flush_interval=30.0):
+        self.db_pool = db_pool
+        self.flush_interval = float(flush_interval)
+        
+        self.lock = threading.Lock()
+        # camera_id -> (statut, date de dernière activité) en attente d'écriture
+        self.pending = {}
+        # camera_id -> dernier statut écrit en base
+        self.written_status = {}
+        self.urgent = threading.Event()
+        
+        self.running = False
+        self.thread = None
+        self.flushes = 0
+        self.updated_rows = 0
+        
+    def start(self):
+        """Démarre le thread d'écriture périodique"""
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='camera-heartbeat', daemon=True)
+        self.thread.start()
+        
+    def update(self, camera_id, status, seen_at=None):
+        """Enregistre le statut en mémoire; un changement d'état déclenche une écriture immédiate"""
+        status = self.DB_STATUS.get(status, status)
+        with self.lock:
+            self.pending[camera_id] = (status, seen_at or datetime.now())
+            transition = self.written_status.get(camera_id) != status
+        if transition:
+            self.urgent.set()
+            
+    def _run(self):
+        while self.running:
+            self.urgent.wait(self.flush_interval)
+            self.urgent.clear()
+            self.flush()
+            
+    def flush(self):
+        """Écrit toutes les caméras modifiées en un seul UPDATE"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return True
+            
+        camera_ids = list(pending)
+        status_cases = ' '.join(['WHEN %s THEN %s'] * len(camera_ids))
+        placeholders = ', '.join(['%s'] * len(camera_ids))
+        params = []
+        for camera_id in camera_ids:
+            params.extend((camera_id, pending[camera_id][0]))
+        for camera_id in camera_ids:
+            params.extend((camera_id, pending[camera_id][1]))
+        params.extend(camera_ids)
+        
+        try:
+            with self.db_pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f"""
+                    UPDATE camera 
+                    SET Status = CASE id {status_cases} END,
+                        Last_connexion = CASE id {status_cases} END
+                    WHERE id IN ({placeholders}) AND Status IN ('active', 'error')
+                """, params)
+                connection.commit()
+                cursor.close()
+                
+        except Error as e:
+            logger.error(f"Erreur mise à jour statut caméras {camera_ids}: {e}")
+            # Remettre en attente ce qui n'a pas été remplacé par une mise à jour plus récente
+            with self.lock:
+                for camera_id, entry in pending.items():
+                    self.pending.setdefault(camera_id, entry)
+            return False
+            
+        with self.lock:
+            for camera_id, (status, _) in pending.items():
+                self.written_status[camera_id] = status
+            self.flushes += 1
+            self.updated_rows += len(camera_ids)
+        return True
+        
+    def forget(self, camera_id):
+        """Abandonne le statut en attente d'une caméra arrêtée par la réconciliation"""
+        with self.lock:
+            self.pending.pop(camera_id, None)
+            self.written_status.pop(camera_id, None)
+            
+    def stop(self, timeout=5):
+        """Arrête le thread après une dernière écriture"""
+        self.running = False
+        self.urgent.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+        self.flush()
+
+class ImageWriter:
+    """Pool de threads d'écriture JPEG avec file bornée, répartition par date et par caméra"""
+    
+    def __init__(self, base_dir, workers=2, max_queue_size=64, jpeg_quality=90, max_width=0, drop_policy='newest',
+                 metrics=None):
+        self.metrics = metrics or Metrics(enabled=False)
+        self.base_dir = base_dir
+        self.workers = max(1, int(workers))
+        self.jpeg_quality = int(jpeg_quality)
+        self.max_width = int(max_width)
+        # 'newest': rejeter la nouvelle image, 'oldest': évincer la plus ancienne en attente
+        self.drop_policy = drop_policy
+        
+        self.pending = queue.Queue(maxsize=max(1, int(max_queue_size)))
+        self.sequence = itertools.count()
+        self.created_dirs = set()
+        self.running = False
+        self.threads = []
+        
+        self.stats_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.bytes_written = 0
+        
+    def start(self):
+        """Démarre les threads d'écriture"""
+        self.running = True
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'image-writer-{index}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+            
+    def image_path(self, camera_id, when):
+        """Chemin unique: <base>/AAAA/MM/JJ/camera_<id>/camera_<id>_<horodatage µs>_<seq>.jpg"""
+        directory = os.path.join(self.base_dir, when.strftime("%Y/%m/%d"), f"camera_{camera_id}")
+        filename = f"camera_{camera_id}_{when.strftime('%Y%m%d_%H%M%S_%f')}_{next(self.sequence)}.jpg"
+        return os.path.join(directory, filename)
+        
+    def submit(self, camera_id, frame, when=None):
+        """
+        Copie (éventuellement réduite) la frame et la met en file d'écriture.
+        Retourne un Future résolu avec le chemin une fois l'image écrite, ou avec None si
+        l'image a été rejetée, évincée de la file ou n'a pas pu être écrite.
+        """
+        when = when or datetime.now()
+        image_path = self.image_path(camera_id, when)
+        
+        # La frame appartient au tampon du grabber: on en garde une copie (réduite si besoin)
+        height, width = frame.shape[:2]
+        if self.max_width and width > self.max_width:
+            size = (self.max_width, max(1, round(height * self.max_width / width)))
+            image = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        else:
+            image = frame.copy()
+            
+        future = Future()
+        job = (image_path, image, future)
+        try:
+            self.pending.put_nowait(job)
+        except queue.Full:
+            if self.drop_policy != 'oldest':
+                self._count_drop(image_path, future)
+                return future
+            try:
+                dropped_path, _, dropped_future = self.pending.get_nowait()
+                self._count_drop(dropped_path, dropped_future)
+            except queue.Empty:
+                pass
+            try:
+                self.pending.put_nowait(job)
+            except queue.Full:
+                self._count_drop(image_path, future)
+        return future
+        
+    def _count_drop(self, image_path, future):
+        future.set_result(None)
+        with self.stats_lock:
+            self.dropped += 1
+        logger.warning(f"File d'écriture des images pleine, image abandonnée: {image_path}")
+        
+    def _run(self):
+        while self.running or not self.pending.empty():
+            try:
+                image_path, image, future = self.pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+                
+            try:
+                start = time.perf_counter()
+                directory = os.path.dirname(image_path)
+                if directory not in self.created_dirs:
+                    os.makedirs(directory, exist_ok=True)
+                    self.created_dirs.add(directory)
+                    
+                ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                if not ok:
+                    raise ValueError("encodage JPEG impossible")
+                with open(image_path, 'wb') as f:
+                    f.write(encoded.tobytes())
+                    
+                self.metrics.observe('image_write_seconds', time.perf_counter() - start)
+                with self.stats_lock:
+                    self.written += 1
+                    self.bytes_written += len(encoded)
+                future.set_result(image_path)
+                    
+            except (OSError, ValueError) as e:
+                logger.error(f"Erreur écriture image {image_path}: {e}")
+                with self.stats_lock:
+                    self.failed += 1
+                future.set_result(None)
+                    
+    def stop(self, timeout=10):
+        """Arrête les threads après avoir vidé la file"""
+        self.running = False
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+            
+    def get_stats(self):
+        with self.stats_lock:
+            return {
+                'queue_size': self.pending.qsize(),
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'bytes_written': self.bytes_written
+            }
+
+FULL_FRAME = (0, 0, None)
+
+class AnalysisPlugin:
+    """
+    Analyse enfichable. Chaque analyse déclare son nom, sa fréquence de base et si elle tourne
+    sans mouvement. Une analyse à modèle (uses_model) déclare son modèle HF et sa capacité de
+    batch; sa spécification d'entrée (taille, normalisation) vient de son extracteur, et les
+    modèles de même spécification partagent redimensionnement et tenseur. Une analyse sans
+    modèle (OpenCV) surcharge analyze().
+    
+    Résultat: {'analysis_type', 'result', 'confidence', 'is_positive', 'details'}; is_positive
+    déclenche l'agrégation d'alerte et la sauvegarde de l'image.
+    """
+    
+    name = None
+    fps = 1.0
+    run_without_movement = False
+    uses_model = False
+    model_name = None
+    # Classes transformers utilisées par load()
+    model_class = 'AutoModelForImageClassification'
+    processor_class = 'AutoImageProcessor'
+    # Taille de batch maximale acceptée par le modèle (None = celle du moteur, 1 = sans batch)
+    max_batch_size = None
+    
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        
+    def load(self, model_name):
+        """Charge (modèle, extracteur) depuis le cache disque local ou Hugging Face"""
+        import transformers
+        model = self.analyzer.load_pretrained(getattr(transformers, self.model_class), model_name)
+        feature_extractor = self.analyzer.load_pretrained(getattr(transformers, self.processor_class), model_name)
+        return model.eval(), feature_extractor
+        
+    def prepare(self, frame, camera_id):
+        """
+        Avant inférence: retourne (résultat, régions, contexte). Sans région, le résultat
+        (éventuellement None) est utilisé tel quel; sinon régions = [(boîte, image)].
+        """
+        return None, [(FULL_FRAME, frame)], None
+        
+    def finish(self, camera_id, regions, predictions, context):
+        """Construit le résultat à partir des prédictions (classe, confiance) de chaque région"""
+        raise NotImplementedError
+        
+    def analyze(self, frame, camera_id):
+        """Analyse sans modèle"""
+        raise NotImplementedError
+        
+    def forget(self, camera_id):
+        """Oublie l'état d'une caméra arrêtée"""
+        pass
+
+class ViolencePlugin(AnalysisPlugin):
+    """Violence (ViT): zones en mouvement recadrées, résultats réutilisés sur frames identiques"""
+    
+    name = 'violence'
+    fps = 1.0
+    uses_model = True
+    model_name = 'jaranohaal/vit-base-violence-detection'
+    model_class = 'ViTForImageClassification'
+    processor_class = 'ViTFeatureExtractor'
+    
+    def prepare(self, frame, camera_id):
+        analyzer = self.analyzer
+        detector = analyzer.motion_detectors.get(camera_id) if camera_id is not None else None
+        # Frame sautée par la détection de mouvement: gray et fg_mask sont ceux d'une frame plus ancienne
+        if detector is not None and not detector.current:
+            detector = None
+        
+        # Frame quasi identique à une frame récente: réutiliser sa classification
+        # (vignette tirée de l'image réduite de la détection de mouvement si disponible)
+        signature = None
+        if camera_id is not None and analyzer.result_cache_ttl > 0:
+            source = detector.gray if detector is not None else frame
+            signature = analyzer.result_cache.signature(source)
+            cached = analyzer.result_cache.lookup(camera_id, self.name, signature)
+            if cached is not None:
+                return {**cached, 'details': {**cached['details'], 'cached': True}}, None, None
+                
+        boxes = None
+        if analyzer.roi_config['enabled'] and detector is not None:
+            boxes = detector.motion_boxes(
+                analyzer.roi_config['top_k'], analyzer.roi_config['min_area'], analyzer.roi_config['padding']
+            )
+            # Uniquement de petites zones en mouvement: pas d'inférence
+            if boxes is not None and not boxes:
+                return None, None, None
+                
+        if not boxes:
+            return None, [(FULL_FRAME, frame)], signature
+        return None, [((left, top, side), frame[top:top + side, left:left + side])
+                      for left, top, side in boxes], signature
+                      
+    def finish(self, camera_id, regions, predictions, signature):
+        # Fusion: la zone violente la plus sûre l'emporte, sinon la plus sûre des autres
+        violent = [p for p in predictions if p[0].lower() == 'violent']
+        predicted_class, confidence = max(violent or predictions, key=lambda p: p[1])
+        
+        result = {
+            'analysis_type': self.name,
+            'result': predicted_class,
+            'confidence': confidence,
+            'is_positive': predicted_class.lower() == 'violent',
+            'is_violent': predicted_class.lower() == 'violent',
+            'details': {
+                'class': predicted_class,
+                'confidence': confidence,
+                'regions': [
+                    {'box': box, 'class': cls, 'confidence': conf}
+                    for (box, _), (cls, conf) in zip(regions, predictions)
+                ]
+            }
+        }
+        if signature is not None:
+            self.analyzer.result_cache.store(camera_id, self.name, signature, result)
+        return result
+        
+    def forget(self, camera_id):
+        self.analyzer.result_cache.forget(camera_id)
+
+class FirePlugin(AnalysisPlugin):
+    """Feu (couleur, OpenCV): frame réduite, objets fixes et scintillement suivis par caméra"""
+    
+    name = 'fire'
+    fps = 0.1
+    run_without_movement = True
+    model_name = 'fire-detection-model'  # À remplacer par un vrai modèle
+    
+    def analyze(self, frame, camera_id):
+        detector = self.analyzer.fire_detector
+        detection = detector.detect(frame, camera_id)
+        
+        return {
+            'analysis_type': self.name,
+            'result': 'fire' if detection['is_fire'] else 'no_fire',
+            'confidence': detection['active_ratio'],
+            'is_positive': detection['is_fire'],
+            'is_fire': detection['is_fire'],
+            'details': {
+                'fire_percentage': detection['fire_ratio'],
+                'active_percentage': detection['active_ratio'],
+                'static_percentage': detection['static_ratio'],
+                'flicker': detection['flicker'],
+                'threshold': detector.threshold
+            }
+        }
+        
+    def forget(self, camera_id):
+        self.analyzer.fire_detector.forget(camera_id)
+
+def load_plugin_classes(spec):
+    """Classes d'analyse supplémentaires: 'module:Classe,module2:Classe2'"""
+    import importlib
+    classes = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        module_name, _, class_name = item.partition(':')
+        try:
+            classes.append(getattr(importlib.import_module(module_name), class_name))
+        except (ImportError, AttributeError, ValueError) as e:
+            logger.error(f"Analyse enfichable '{item}' introuvable: {e}")
+    return classes
+
+class CameraSupervisor:
+    """
+    Supervise les caméras depuis une boucle asyncio (thread dédié): une tâche par caméra,
+    le traitement bloquant (ouverture, décodage, analyse) tourne dans un thread propre à
+    chaque exécution, si bien qu'aucune caméra n'attend qu'une autre libère un thread.
+    Une caméra qui s'arrête sur erreur est relancée sans attendre le prochain sondage, avec un
+    délai exponentiel aléatoire; démarrages et reconnexions sont étalés (pas de rafale).
+    """
+    def __init__(self, run_camera, backoff_base=1.0, backoff_max=300.0, start_jitter=5.0, healthy_seconds=60.0):
+        self.run_camera = run_camera  # run_camera(camera, stop_event), bloquant
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.start_jitter = start_jitter
+        self.healthy_seconds = healthy_seconds
+        self.loop = None
+        self.thread = None
+        self.cameras = {}  # camera_id -> état (modifié uniquement dans la boucle)
+        self.start_lock = threading.Lock()
+        
+    def start(self):
+        """Démarre la boucle asyncio (idempotent)"""
+        with self.start_lock:
+            if self.loop is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, name='camera-supervisor', daemon=True)
+            self.thread.start()
+            
+    def call(self, coroutine, timeout=None):
+        """Exécute une coroutine dans la boucle depuis un autre thread et attend son résultat"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+        
+    def reconcile(self, cameras, fingerprints):
+        """Applique la liste voulue: démarre, arrête ou redémarre (configuration changée)"""
+        self.start()
+        self.call(self._reconcile(cameras, fingerprints))
+        
+    def stop_camera(self, camera_id, timeout=5):
+        """Arrête une caméra et attend la fin de son traitement"""
+        if self.loop is not None:
+            self.call(self._stop_cameras([camera_id], timeout))
+            
+    def stop(self, timeout=15):
+        """Arrête toutes les caméras en parallèle (un seul délai global), puis la boucle"""
+        if self.loop is None:
+            return
+        try:
+            self.call(self._stop_cameras(list(self.cameras), timeout), timeout + 5)
+        except Exception as e:
+            logger.error(f"Erreur arrêt des caméras: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        # Les threads de caméra encore bloqués (flux figé) sont abandonnés: ils sont démons
+        self.thread.join(timeout=5)
+        
+    def status(self):
+        """État par caméra: traitement en cours, relances, prochaine tentative"""
+        return {
+            camera_id: {
+                'running': state['running'],
+                'restarts': state['restarts'],
+                'failures': state['failures'],
+                'next_start': state['next_start']
+            }
+            for camera_id, state in list(self.cameras.items())
+        }
+        
+    async def _reconcile(self, cameras, fingerprints):
+        wanted = {camera['id']: camera for camera in cameras}
+        removed = [camera_id for camera_id in self.cameras if camera_id not in wanted]
+        for camera_id in removed:
+            logger.info(f"Caméra {camera_id} retirée, arrêt")
+            self._signal_stop(self.cameras.pop(camera_id))
+            
+        for camera_id, camera in wanted.items():
+            previous = self.cameras.get(camera_id)
+            if previous is not None:
+                if previous['fingerprint'] == fingerprints[camera_id] and not previous['task'].done():
+                    continue
+                logger.info(f"Caméra {camera_id} modifiée, redémarrage")
+                self._signal_stop(previous)
+            state = {
+                'camera': camera,
+                'fingerprint': fingerprints[camera_id],
+                'stop_event': threading.Event(),
+                'wake': asyncio.Event(),
+                'running': False,
+                'restarts': 0,
+                'failures': 0,
+                'next_start': None
+            }
+            state['task'] = asyncio.create_task(self._supervise(state, previous and previous['task']))
+            self.cameras[camera_id] = state
+
+            
+    async def _stop_cameras(self, camera_ids, timeout):
+        states = [self.cameras.pop(camera_id) for camera_id in camera_ids if camera_id in self.cameras]
+        for state in states:
+            self._signal_stop(state)
+        tasks = [state['task'] for state in states]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            if pending:
+                logger.warning(f"{len(pending)} caméra(s) encore actives après {timeout}s")
+                
+    def _signal_stop(self, state):
+        state['stop_event'].set()
+        state['wake'].set()
+        
+    async def _sleep(self, state, delay):
+        """Attente interrompue par l'arrêt de la caméra"""
+        state['next_start'] = time.time() + delay
+        try:
+            await asyncio.wait_for(state['wake'].wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        state['next_start'] = None
+        
+    def _run_in_thread(self, state):
+        """Lance run_camera dans un thread dédié; retourne un Future asyncio résolu à sa fin"""
+        loop = asyncio.get_running_loop()
+        finished = loop.create_future()
+        
+        def done(error):
+            if not finished.done():
+                if error is None:
+                    finished.set_result(None)
+                else:
+                    finished.set_exception(error)
+                    
+        def run():
+            # En cours seulement une fois le traitement réellement démarré
+            state['running'] = True
+            error = None
+            try:
+                self.run_camera(state['camera'], state['stop_event'])
+            except Exception as e:
+                error = e
+            finally:
+                state['running'] = False
+                try:
+                    loop.call_soon_threadsafe(done, error)
+                except RuntimeError:
+                    # Boucle déjà fermée (arrêt du processus)
+                    pass
+                    
+        threading.Thread(target=run, name=f"camera-{state['camera']['id']}", daemon=True).start()
+        return finished
+        
+    async def _supervise(self, state, previous_task):
+        camera_id = state['camera']['id']
+        stop_event = state['stop_event']
+        # Jamais deux traitements simultanés pour une même caméra
+        if previous_task is not None:
+            await asyncio.wait([previous_task])
+        loop = asyncio.get_running_loop()
+        delay = random.uniform(0, self.start_jitter)
+        
+        while not stop_event.is_set():
+            if delay > 0:
+                await self._sleep(state, delay)
+                if stop_event.is_set():
+                    break
+            started = loop.time()
+            try:
+                await self._run_in_thread(state)
+            except Exception as e:
+                logger.error(f"Erreur caméra {camera_id}: {e}")
+            if stop_event.is_set():
+                break
+                
+            # Un traitement resté sain assez longtemps repart de zéro
+            if loop.time() - started >= self.healthy_seconds:
+                state['failures'] = 0
+            state['failures'] += 1
+            state['restarts'] += 1
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (state['failures'] - 1))
+            delay *= random.uniform(0.5, 1.5)
+            logger.warning(f"Caméra {camera_id} arrêtée, relance dans {delay:.1f}s "
+                           f"(échec {state['failures']})")
+
+class ClusterMembership:
+    """
+    Répartition des caméras entre plusieurs instances de l'analyseur (conteneurs, machines)
+    partageant la même base. Chaque nœud renouvelle un bail dans la table analyzer_node; un
+    nœud dont le bail a expiré est considéré mort. Tous les nœuds calculent la même
+    répartition sans coordinateur: hachage de rendez-vous pondéré par la capacité, avec une
+    charge bornée par nœud. L'arrivée ou la perte d'un nœud ne déplace que les caméras
+    nécessaires.
+    """
+    
+    def __init__(self, db_pool, node_id, capacity=1.0, lease_seconds=30.0, load_factor=1.25):
+        self.db_pool = db_pool
+        self.node_id = node_id
+        self.capacity = max(0.01, float(capacity))
+        self.lease_seconds = float(lease_seconds)
+        self.load_factor = max(1.0, float(load_factor))
+        self.nodes = {node_id: self.capacity}  # dernière vue connue des nœuds vivants
+        self.assigned = 0
+        self.table_ready = False
+        
+    def ensure_table(self):
+        with self.db_pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS analyzer_node (
+                    node_id VARCHAR(255) NOT NULL PRIMARY KEY,
+                    capacity DOUBLE NOT NULL DEFAULT 1,
+                    cameras INTEGER NOT NULL DEFAULT 0,
+                    last_seen DATETIME NOT NULL
+                )
+            """)
+            connection.commit()
+            cursor.close()
+        self.table_ready = True
+        
+    def heartbeat(self):
+        """Renouvelle le bail du nœud et relit les nœuds vivants (vue précédente conservée en cas d'erreur)"""
+        try:
+            if not self.table_ready:
+                self.ensure_table()
+            with self.db_pool.connection() as connection:
+                cursor = connection.cursor()
+                # Horloge de la base: pas de dépendance à l'heure des machines
+                cursor.execute("""
+                    INSERT INTO analyzer_node (node_id, capacity, cameras, last_seen)
+                    VALUES (%s, %s, %s, NOW())
+                    ON DUPLICATE KEY UPDATE capacity = VALUES(capacity), cameras = VALUES(cameras),
+                                            last_seen = VALUES(last_seen)
+                """, (self.node_id, self.capacity, self.assigned))
+                # Oublier les nœuds morts depuis longtemps
+                cursor.execute(
+                    "DELETE FROM analyzer_node WHERE last_seen < NOW() - INTERVAL %s SECOND",
+                    (int(self.lease_seconds * 10),)
+                )
+                connection.commit()
+                cursor.execute(
+                    "SELECT node_id, capacity FROM analyzer_node WHERE last_seen >= NOW() - INTERVAL %s SECOND",
+                    (int(self.lease_seconds),)
+                )
+                nodes = {node_id: float(capacity) for node_id, capacity in cursor.fetchall()}
+                cursor.close()
+                
+        except Error as e:
+            logger.error(f"Erreur bail du nœud {self.node_id}: {e}")
+            return False
+            
+        nodes[self.node_id] = self.capacity
+        if set(nodes) != set(self.nodes):
+            logger.info(f"Nœuds actifs: {sorted(nodes)}")
+        self.nodes = nodes
+        return True
+        
+    def leave(self):
+        """Libère le bail à l'arrêt: les autres nœuds reprennent les caméras sans attendre l'expiration"""
+        if not self.table_ready:
+            return
+        try:
+            with self.db_pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("DELETE FROM analyzer_node WHERE node_id = %s", (self.node_id,))
+                connection.commit()
+                cursor.close()
+        except Error as e:
+            logger.error(f"Erreur libération du bail {self.node_id}: {e}")
+            
+    @staticmethod
+    def score(node_id, camera_id, capacity):
+        """Score de rendez-vous pondéré: -capacité / ln(u), u uniforme et stable entre processus"""
+        digest = hashlib.blake2b(f'{node_id}|{camera_id}'.encode(), digest_size=8).digest()
+        u = (int.from_bytes(digest, 'big') + 1) / (2 ** 64 + 2)
+        return -capacity / math.log(u)
+        
+    def assign(self, cameras, nodes=None):
+        """
+        Répartition déterministe {node_id: [caméras]}: chaque caméra va au nœud de meilleur
+        score qui n'a pas atteint sa charge maximale (load_factor x part de sa capacité).
+        """
+        nodes = nodes or self.nodes
+        total_capacity = sum(nodes.values())
+        limits = {
+            node_id: math.ceil(self.load_factor * len(cameras) * capacity / total_capacity)
+            for node_id, capacity in nodes.items()
+        }
+        shards = {node_id: [] for node_id in nodes}
+        for camera in sorted(cameras, key=lambda camera: camera['id']):
+            ranked = sorted(nodes, key=lambda node_id: self.score(node_id, camera['id'], nodes[node_id]),
+                            reverse=True)
+            for node_id in ranked:
+                if len(shards[node_id]) < limits[node_id]:
+                    shards[node_id].append(camera)
+                    break
+        return shards
+        
+    def shard(self, cameras):
+        """Caméras attribuées à ce nœud"""
+        shard = self.assign(cameras)[self.node_id]
+        self.assigned = len(shard)
+        return shard
+        
+    def get_stats(self):
+        return {'nodes': len(self.nodes), 'cameras': self.assigned, 'capacity': self.capacity}
+
 class VideoAnalyzer:
-    def __init__(self):
+    def __init__(self, with_models=True, db_pool=None):
         self.db_config = {
             'host': os.getenv('DB_HOST', 'localhost'),
             'port': int(os.getenv('DB_PORT', 3306)),
@@ -43,77 +2496,401 @@ class VideoAnalyzer:
             'database': os.getenv('DB_NAME', 'smartcam')
         }
         
+        # Connexions persistantes partagées par toutes les caméras (pool injectable: benchmarks)
+        self.db_pool = db_pool or ConnectionPool(
+            self.db_config,
+            size=int(os.getenv('DB_POOL_SIZE', 5)),
+            timeout=float(os.getenv('DB_POOL_TIMEOUT', 5)),
+            health_check_interval=float(os.getenv('DB_POOL_HEALTHCHECK', 30))
+        )
+        
+        # Métriques Prometheus (endpoint HTTP et/ou fichier texte), sans coût si désactivées
+        self.metrics = Metrics(enabled=os.getenv('METRICS_ENABLED', '0') == '1')
+        self.metrics.describe('frames_total', "Frames prises en charge par la boucle d'analyse")
+        self.metrics.describe('motion_ratio', "Proportion de pixels en mouvement",
+                              buckets=(0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0))
+        self.metrics.describe('stage_seconds', "Durée des étapes de process_camera_stream")
+        self.metrics.describe('analysis_seconds', "Durée des fonctions d'analyse")
+        self.metrics.describe('analyses_total', "Analyses effectuées par type et résultat")
+        self.metrics.describe('db_write_seconds', "Durée d'écriture d'un lot de résultats en base")
+        self.metrics.describe('image_write_seconds', "Durée d'encodage et d'écriture d'une image")
+        self.metrics.register_collector(self.collect_metrics)
+        
+        # Écriture différée des résultats, les caméras ne bloquent jamais sur la base
+        self.result_writer = ResultWriter(
+            self.db_pool,
+            batch_size=int(os.getenv('DB_WRITE_BATCH_SIZE', 100)),
+            flush_interval=float(os.getenv('DB_WRITE_FLUSH_INTERVAL', 1.0)),
+            max_queue_size=int(os.getenv('DB_WRITE_QUEUE_SIZE', 10000)),
+            metrics=self.metrics
+        )
+        self.result_writer.start()
+        
+        # Écriture asynchrone des images analysées
+        self.image_writer = ImageWriter(
+            os.getenv('STORAGE_DIR', '/app/storage/images'),
+            workers=int(os.getenv('IMAGE_WRITER_THREADS', 2)),
+            max_queue_size=int(os.getenv('IMAGE_QUEUE_SIZE', 64)),
+            jpeg_quality=int(os.getenv('IMAGE_JPEG_QUALITY', 90)),
+            max_width=int(os.getenv('IMAGE_MAX_WIDTH', 0)),
+            drop_policy=os.getenv('IMAGE_DROP_POLICY', 'newest'),
+            metrics=self.metrics
+        )
+        self.image_writer.start()
+        
+        # Statuts caméra agrégés en mémoire et écrits par lots
+        self.camera_heartbeat = CameraHeartbeat(
+            self.db_pool,
+            flush_interval=float(os.getenv('HEARTBEAT_INTERVAL', 30))
+        )
+        self.camera_heartbeat.start()
+        
         # Clé de chiffrement pour les identifiants (à générer une fois)
         self.fernet_key = os.getenv('FERNET_KEY', '').encode()
         if not self.fernet_key:
             self.fernet_key = Fernet.generate_key()
             logger.warning(f"Nouvelle clé générée: {self.fernet_key.decode()}")
         self.cipher = Fernet(self.fernet_key)
+        self.credentials_cache = {}
         
-        # Modèles Hugging Face en local
-        self.models = {}
-        self.load_models()
+        # Réconciliation incrémentale des caméras
+        self.camera_marker = None
+        self.cameras = []
         
-        # Configuration des analyses
+        # Analyses enfichables: intégrées + ANALYSIS_PLUGINS="module:Classe,..." (même nom = remplacement)
+        self.plugins = {}
+        for plugin_class in [ViolencePlugin, FirePlugin] + load_plugin_classes(os.getenv('ANALYSIS_PLUGINS', '')):
+            plugin = plugin_class(self)
+            self.plugins[plugin.name] = plugin
+            
+        # Configuration des analyses (déclarée par chaque analyse)
         self.analysis_config = {
-            'violence': {'fps': 1.0, 'model': 'jaranohaal/vit-base-violence-detection'},
-            'fire': {'fps': 0.1, 'model': 'fire-detection-model'},  # À remplacer par un vrai modèle
-            'movement': {'fps': 5.0, 'model': 'opencv'}
+            name: {'fps': plugin.fps, 'model': plugin.model_name, 'run_without_movement': plugin.run_without_movement}
+            for name, plugin in self.plugins.items()
         }
+        # Analyses actives: les modèles des analyses désactivées ne sont jamais chargés
+        enabled_analyses = os.getenv('ENABLED_ANALYSES', '')
+        if enabled_analyses:
+            enabled = {name.strip().lower() for name in enabled_analyses.split(',')}
+            self.analysis_config = {name: config for name, config in self.analysis_config.items()
+                                    if name in enabled}
+        # Surcharges HF_MODELS: {"fire": "username/fire-detector", "fire:fps": 0.2}
+        try:
+            hf_models = json.loads(os.getenv('HF_MODELS', '{}') or '{}')
+        except ValueError:
+            logger.error("HF_MODELS n'est pas un JSON valide, ignoré")
+            hf_models = {}
+        for name, config in self.analysis_config.items():
+            config['model'] = hf_models.get(name, config['model'])
+            config['fps'] = float(hf_models.get(f'{name}:fps', config['fps']))
+        
+        # Modèles Hugging Face en local, chargés à la demande (ou préchargés en arrière-plan)
+        self.models = {}
+        self.inference_engine = None
+        self.inference_timeout = float(os.getenv('INFERENCE_TIMEOUT', 10))
+        self.model_cache_dir = os.getenv('MODEL_CACHE_DIR', 'storage/models')
+        self.models_lock = threading.Lock()
+        self.models_loaded = False
+        self.models_retry_time = 0
+        self.preload_models = with_models and os.getenv('MODEL_PRELOAD', '1') == '1'
+        self.startup_timings = {}
+        
+        # Registre des analyses de la table analyse (ids, seuils, fréquences, analyses enfichables)
+        self.analysis_registry = AnalysisRegistry(
+            self.db_pool,
+            self.analysis_config,
+            self.plugins,
+            ttl=float(os.getenv('ANALYSIS_REGISTRY_TTL', 60))
+        )
+        self.alert_aggregator = AlertAggregator(
+            window_seconds=float(os.getenv('ALERT_WINDOW', 30)),
+            decay_seconds=float(os.getenv('ALERT_DECAY', 60)),
+            snapshot_interval=float(os.getenv('ALERT_SNAPSHOT_INTERVAL', 60))
+        )
         
         # Détection de mouvement
-        self.background_subtractors = {}
+        self.motion_detectors = {}
+        self.motion_config = {
+            'width': int(os.getenv('MOTION_WIDTH', 320)),
+            'threshold': float(os.getenv('MOTION_THRESHOLD', 0.01)),
+            'frame_skip': int(os.getenv('MOTION_FRAME_SKIP', 0))
+        }
+        # Masques de zone par caméra: <MOTION_MASK_DIR>/camera_<id>.png (blanc = surveillé)
+        self.motion_mask_dir = os.getenv('MOTION_MASK_DIR', '')
+        
+        # Recadrage sur les zones en mouvement avant l'analyse de violence
+        self.roi_config = {
+            'enabled': os.getenv('ROI_ENABLED', '1') == '1',
+            'top_k': int(os.getenv('ROI_TOP_K', 3)),
+            'min_area': float(os.getenv('ROI_MIN_AREA', 0.002)),
+            'padding': float(os.getenv('ROI_PADDING', 0.25))
+        }
+        
+        # Détection de feu sur frame réduite avec filtrage des objets rouges fixes
+        self.fire_detector = FireDetector(
+            width=int(os.getenv('FIRE_WIDTH', 320)),
+            threshold=float(os.getenv('FIRE_THRESHOLD', 0.05)),
+            min_flicker=float(os.getenv('FIRE_MIN_FLICKER', 0.1)),
+            static_alpha=float(os.getenv('FIRE_STATIC_ALPHA', 0.1))
+        )
         
-        # Threads actifs
-        self.active_threads = {}
+        # Réutilisation des résultats sur frames quasi identiques (0 = désactivé)
+        self.result_cache_ttl = float(os.getenv('RESULT_CACHE_TTL', 10))
+        self.result_cache = ResultCache(
+            size=int(os.getenv('RESULT_CACHE_SIZE', 32)),
+            threshold=int(os.getenv('RESULT_CACHE_THRESHOLD', 10)),
+            max_changed=float(os.getenv('RESULT_CACHE_MAX_CHANGED', 0.01)),
+            ttl=self.result_cache_ttl
+        )
+        
+        # Supervision asyncio des caméras (relance avec délai exponentiel, arrêt concurrent)
+        self.camera_supervisor = CameraSupervisor(
+            self.process_camera_stream,
+            backoff_base=float(os.getenv('SUPERVISOR_BACKOFF_BASE', 1)),
+            backoff_max=float(os.getenv('SUPERVISOR_BACKOFF_MAX', 300)),
+            start_jitter=float(os.getenv('SUPERVISOR_START_JITTER', 5)),
+            healthy_seconds=float(os.getenv('SUPERVISOR_HEALTHY_SECONDS', 60))
+        )
         self.running = True
         
+        # Décodage découplé de l'analyse (une case = une frame préallouée)
+        self.frame_grabbers = {}
+        self.frame_buffer_size = int(os.getenv('FRAME_BUFFER_SIZE', 3))
+        # Flux abandonné (puis relancé par le superviseur) après N erreurs de lecture
+        # consécutives ou sans frame depuis CAPTURE_STALL_TIMEOUT secondes
+        self.max_read_errors = int(os.getenv('CAPTURE_MAX_READ_ERRORS', 5))
+        self.stall_timeout = float(os.getenv('CAPTURE_STALL_TIMEOUT', 30))
+        self.analysis_interval = float(os.getenv('ANALYSIS_INTERVAL', 0.1))
+        
+        # Couche de capture: sous-flux d'analyse, backend de décodage, réduction, images clés
+        # STREAM_TEMPLATE: champs {user}/{username}, {password}, {ip}/{ip_address}, {id}, {stream}
+        self.stream_template = os.getenv('STREAM_TEMPLATE', 'rtsp://{user}:{password}@{ip}/{stream}')
+        self.capture_config = {
+            'backend': os.getenv('CAPTURE_BACKEND', 'opencv'),
+            'width': int(os.getenv('CAPTURE_WIDTH', 0)),
+            'keyframes_only': os.getenv('CAPTURE_KEYFRAMES_ONLY', '0') == '1',
+            'buffer_size': int(os.getenv('CAPTURE_BUFFER_SIZE', 1))
+        }
+        self.capture_stream = os.getenv('CAMERA_STREAM', 'live0')
+        if '{stream}' not in self.stream_template:
+            if self.stream_template.startswith('rtsp://') and self.stream_template.endswith('/'):
+                # Ancien modèle de .env.example (rtsp://{user}:{password}@{ip}/): sous-flux ajouté
+                logger.warning(f"STREAM_TEMPLATE sans {{stream}}: sous-flux '{self.capture_stream}' ajouté "
+                               f"en fin d'URL (ajoutez {{stream}} au modèle)")
+                self.stream_template += '{stream}'
+            elif os.getenv('CAMERA_STREAM'):
+                logger.warning(f"STREAM_TEMPLATE sans {{stream}}: CAMERA_STREAM={self.capture_stream} ignoré")
+        
+        
+        # Mode multi-processus: caméras réparties par id sur N processus (0 = threads)
+        self.num_workers = int(os.getenv('ANALYZER_WORKERS', 0))
+        self.workers = {}
+        
+        # Mode grappe: caméras réparties entre les instances partageant la base (bail par nœud)
+        self.cluster = None
+        if os.getenv('CLUSTER_ENABLED', '0') == '1':
+            self.cluster = ClusterMembership(
+                self.db_pool,
+                os.getenv('CLUSTER_NODE_ID') or f'{socket.gethostname()}:{os.getpid()}',
+                capacity=float(os.getenv('CLUSTER_CAPACITY') or os.cpu_count() or 1),
+                lease_seconds=float(os.getenv('CLUSTER_LEASE_SECONDS', 30)),
+                load_factor=float(os.getenv('CLUSTER_LOAD_FACTOR', 1.25))
+            )
+        
+        # Fréquences d'analyse adaptatives sous budget global (partagé entre les processus)
+        self.analysis_scheduler = AnalysisScheduler(
+            budget_fps=float(os.getenv('ANALYSIS_BUDGET_FPS', 0)) / max(1, self.num_workers),
+            min_scale=float(os.getenv('SCHEDULER_MIN_SCALE', 0.5)),
+            max_scale=float(os.getenv('SCHEDULER_MAX_SCALE', 3.0)),
+            motion_threshold=self.motion_config['threshold'],
+            motion_tau=float(os.getenv('SCHEDULER_MOTION_TAU', 5)),
+            hot_seconds=float(os.getenv('SCHEDULER_HOT_SECONDS', 60))
+        )
+        
+    def load_pretrained(self, loader, model_name):
+        """Charge un modèle HF depuis le cache disque local, ou le télécharge puis l'y enregistre"""
+        local_dir = os.path.join(self.model_cache_dir, 'hf', model_name.replace('/', '--'))
+        if os.path.isdir(local_dir):
+            try:
+                return loader.from_pretrained(local_dir, local_files_only=True)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Cache local inutilisable pour {model_name}: {e}")
+                
+        obj = loader.from_pretrained(model_name)
+        try:
+            obj.save_pretrained(local_dir)
+        except OSError as e:
+            logger.warning(f"Impossible d'enregistrer {model_name} dans le cache local: {e}")
+        return obj
+        
     def load_models(self):
         """Charge les modèles Hugging Face en local"""
         try:
             logger.info("Chargement des modèles Hugging Face...")
             
-            # Modèle de détection de violence
-            self.models['violence'] = {
-                'model': ViTForImageClassification.from_pretrained('jaranohaal/vit-base-violence-detection'),
-                'feature_extractor': ViTFeatureExtractor.from_pretrained('jaranohaal/vit-base-violence-detection')
-            }
+            # Seuls les modèles des analyses actives sont chargés
+            model_plugins = [plugin for name, plugin in self.plugins.items()
+                             if plugin.uses_model and name in self.analysis_config]
+            if not model_plugins:
+                logger.info("Aucune analyse à modèle active, aucun modèle à charger")
+                return
+                
+            # Imports coûteux différés au premier chargement
+            start = time.perf_counter()
+            import torch  # noqa: F401
+            import transformers  # noqa: F401
+            self.startup_timings['import'] = time.perf_counter() - start
+            
+            # Moteur d'inférence partagé par toutes les caméras et toutes les analyses à modèle
+            start = time.perf_counter()
+            num_threads = int(os.getenv('INFERENCE_THREADS', 0)) or None
+            max_batch_size = int(os.getenv('INFERENCE_MAX_BATCH', 16))
+            inference_engine = InferenceEngine(
+                max_batch_size=max_batch_size,
+                max_wait_ms=float(os.getenv('INFERENCE_MAX_WAIT_MS', 20)),
+                num_threads=num_threads
+            )
+            
+            for plugin in model_plugins:
+                model_name = self.analysis_config[plugin.name]['model']
+                model, feature_extractor = plugin.load(model_name)
+                self.models[plugin.name] = {'model': model, 'feature_extractor': feature_extractor}
+                
+                # Backend d'inférence: eager, torchscript ou onnx (exporté une fois, mis en cache)
+                backend = create_inference_backend(
+                    model,
+                    model_name,
+                    kind=os.getenv('INFERENCE_BACKEND', 'eager'),
+                    quantize=os.getenv('INFERENCE_QUANTIZE', '0') == '1',
+                    cache_dir=self.model_cache_dir,
+                    num_threads=num_threads
+                )
+                logger.info(f"Backend d'inférence {plugin.name}: {backend.name}")
+                
+                preprocessor = FramePreprocessor.from_feature_extractor(
+                    feature_extractor,
+                    max_batch_size,
+                    exact_resize=os.getenv('PREPROCESS_EXACT_RESIZE', '0') == '1'
+                )
+                inference_engine.add_model(
+                    plugin.name, backend, model.config.id2label, preprocessor, plugin.max_batch_size
+                )
+                
+            inference_engine.start()
+            self.startup_timings['model_load'] = time.perf_counter() - start
+            
+            # Première inférence (préchauffage) avant d'accepter les frames des caméras
+            start = time.perf_counter()
+            warmup_frame = np.zeros(inference_engine.preprocessor.size + (3,), dtype=np.uint8)
+            inference_engine.submit(warmup_frame, [plugin.name for plugin in model_plugins]).result(
+                timeout=max(self.inference_timeout, 60)
+            )
+            self.startup_timings['first_inference'] = time.perf_counter() - start
+            self.inference_engine = inference_engine
             
             logger.info("Modèles chargés avec succès")
             
         except Exception as e:
             logger.error(f"Erreur lors du chargement des modèles: {e}")
             
+        finally:
+            self.startup_timings['ready'] = time.perf_counter() - PROCESS_START
+            self.log_startup_report()
+            
+    def log_startup_report(self):
+        """Journalise la décomposition du temps de démarrage"""
+        timings = self.startup_timings
+        logger.info(
+            "Rapport de démarrage: "
+            f"imports {timings.get('import', 0):.2f}s, "
+            f"chargement modèles {timings.get('model_load', 0):.2f}s, "
+            f"première inférence {timings.get('first_inference', 0):.2f}s, "
+            f"prêt {timings.get('ready', 0):.2f}s après le lancement"
+        )
+        
+    def ensure_models(self):
+        """
+        Charge les modèles au premier besoin, sans bloquer les caméras pendant un chargement
+        déjà en cours; un échec n'est retenté qu'après 60 s.
+        """
+        if self.models_loaded:
+            return True
+            
+        if not self.models_lock.acquire(blocking=False):
+            return False
+        try:
+            if not self.models_loaded and time.monotonic() >= self.models_retry_time:
+                self.load_models()
+                self.models_loaded = self.inference_engine is not None or not any(
+                    plugin.uses_model for name, plugin in self.plugins.items() if name in self.analysis_config
+                )
+                if not self.models_loaded:
+                    self.models_retry_time = time.monotonic() + 60
+        finally:
+            self.models_lock.release()
+            
+        return self.models_loaded
+        
     def decrypt_credentials(self, encrypted_data):
-        """Déchiffre les identifiants de caméra"""
+        """Déchiffre les identifiants de caméra (mis en cache par texte chiffré)"""
+        if encrypted_data in self.credentials_cache:
+            return self.credentials_cache[encrypted_data]
+            
         try:
-            return self.cipher.decrypt(encrypted_data.encode()).decode()
+            decrypted = self.cipher.decrypt(encrypted_data.encode()).decode()
         except Exception as e:
             logger.error(f"Erreur de déchiffrement: {e}")
-            return None
+            decrypted = None
             
-    def get_cameras(self):
-        """Récupère la liste des caméras depuis la base de données"""
+        if len(self.credentials_cache) >= 4096:
+            self.credentials_cache.clear()
+        self.credentials_cache[encrypted_data] = decrypted
+        return decrypted
+        
+    def get_camera_marker(self):
+        """
+        Marqueur de changement des caméras à traiter (nombre et somme de contrôle des colonnes
+        de configuration, hors Last_connexion et Status mis à jour en continu). None en cas d'erreur.
+        """
         try:
-            connection = mysql.connector.connect(**self.db_config)
-            cursor = connection.cursor(dictionary=True)
+            with self.db_pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("""
+                    SELECT COUNT(*), BIT_XOR(CRC32(CONCAT_WS('|', id, Ip_address, Username, Password, Model)))
+                    FROM camera 
+                    WHERE Status IN ('active', 'error')
+                """)
+                marker = tuple(cursor.fetchone() or ())
+                cursor.close()
+            return marker
             
-            cursor.execute("""
-                SELECT id, Ip_address as ip_address, Username as username, Password as password, 
-                       Last_connexion as last_connection, Status as status, Model as model
-                FROM camera 
-                WHERE Status = 'active'
-            """)
+        except Error as e:
+            logger.error(f"Erreur base de données: {e}")
+            return None
             
-            cameras = cursor.fetchall()
+    def get_cameras(self):
+        """
+        Récupère les caméras à traiter: actives, et en erreur (statut écrit par l'analyseur,
+        qui continue de les relancer avec délai; 'inactive' ou 'maintenance' les arrêtent)
+        """
+        try:
+            with self.db_pool.connection() as connection:
+                cursor = connection.cursor(dictionary=True)
+                
+                cursor.execute("""
+                    SELECT id, Ip_address as ip_address, Username as username, Password as password, 
+                           Last_connexion as last_connection, Status as status, Model as model
+                    FROM camera 
+                    WHERE Status IN ('active', 'error')
+                """)
+                
+                cameras = cursor.fetchall()
+                cursor.close()
             
-            # Déchiffrer les identifiants
+            # Déchiffrer les identifiants (connexion déjà rendue au pool)
             for camera in cameras:
                 camera['username'] = self.decrypt_credentials(camera['username'])
                 camera['password'] = self.decrypt_credentials(camera['password'])
-                
-            cursor.close()
-            connection.close()
             
             return cameras
             
@@ -122,289 +2899,424 @@ class VideoAnalyzer:
             return []
             
     def update_camera_status(self, camera_id, status, last_frame_time=None):
-        """Met à jour le statut de la caméra"""
-        try:
-            connection = mysql.connector.connect(**self.db_config)
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                UPDATE camera 
-                SET Status = %s, Last_connexion = %s
-                WHERE id = %s
-            """, (status, datetime.now(), camera_id))
-                
-            connection.commit()
-            cursor.close()
-            connection.close()
+        """Met à jour le statut de la caméra (écriture groupée, immédiate si l'état change)"""
+        seen_at = datetime.fromtimestamp(last_frame_time) if last_frame_time else None
+        self.camera_heartbeat.update(camera_id, status, seen_at)
+        
+    def load_region_mask(self, camera_id):
+        """Charge le masque de zone d'une caméra s'il existe"""
+        if not self.motion_mask_dir:
+            return None
             
-        except Error as e:
-            logger.error(f"Erreur mise à jour statut caméra {camera_id}: {e}")
+        mask_path = os.path.join(self.motion_mask_dir, f"camera_{camera_id}.png")
+        if not os.path.exists(mask_path):
+            return None
             
+        mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
+        if mask is None:
+            logger.error(f"Masque de zone illisible pour caméra {camera_id}: {mask_path}")
+        else:
+            logger.info(f"Masque de zone chargé pour caméra {camera_id}")
+        return mask
+        
     def detect_movement(self, frame, camera_id):
         """Détecte le mouvement dans une frame"""
-        if camera_id not in self.background_subtractors:
-            self.background_subtractors[camera_id] = cv2.createBackgroundSubtractorMOG2()
+        if camera_id not in self.motion_detectors:
+            self.motion_detectors[camera_id] = MotionDetector(
+                region_mask=self.load_region_mask(camera_id),
+                **self.motion_config
+            )
             
-        fg_mask = self.background_subtractors[camera_id].apply(frame)
-        
-        # Calculer le pourcentage de pixels en mouvement
-        movement_percentage = np.sum(fg_mask > 0) / (fg_mask.shape[0] * fg_mask.shape[1])
+        movement_detected, motion_ratio = self.motion_detectors[camera_id].apply(frame)
+        self.analysis_scheduler.observe_motion(camera_id, motion_ratio)
+        self.metrics.observe('motion_ratio', motion_ratio, camera=camera_id)
+        return movement_detected
         
-        return movement_percentage > 0.01  # Seuil de 1%
+    def run_analyses(self, frame, camera_id, plugins):
+        """
+        Exécute en une passe les analyses dues sur une frame: les analyses sans modèle
+        directement, les analyses à modèle en soumettant chaque région une seule fois au
+        moteur d'inférence pour tous les modèles concernés (batch commun). Retourne {nom: résultat}.
+        """
+        results = {}
+        pending = []
+        started = {}
         
-    def analyze_violence(self, image):
-        """Analyse la violence dans une image"""
-        try:
-            model_data = self.models['violence']
-            
-            # Préprocesser l'image
-            inputs = model_data['feature_extractor'](images=image, return_tensors="pt")
-            
-            # Effectuer l'inférence
-            with torch.no_grad():
-                outputs = model_data['model'](**inputs)
-                logits = outputs.logits
-                probabilities = torch.nn.functional.softmax(logits, dim=-1)
+        for plugin in plugins:
+            started[plugin.name] = time.perf_counter()
+            try:
+                if not plugin.uses_model:
+                    results[plugin.name] = plugin.analyze(frame, camera_id)
+                    self.metrics.observe('analysis_seconds', time.perf_counter() - started[plugin.name],
+                                         camera=camera_id, analysis=plugin.name)
+                    continue
+                result, regions, context = plugin.prepare(frame, camera_id)
+                # Chargement paresseux des modèles au premier besoin; analyse non activée
+                # (ENABLED_ANALYSES) ou modèle non chargé: pas de résultat
+                if regions and not (self.ensure_models() and self.inference_engine is not None
+                                    and plugin.name in self.inference_engine.models):
+                    result, regions = None, None
+                if not regions:
+                    results[plugin.name] = result
+                    continue
+                pending.append((plugin, regions, context))
+            except Exception as e:
+                logger.error(f"Erreur analyse {plugin.name}: {e}")
+                results[plugin.name] = None
                 
-            # Récupérer les résultats
-            predicted_class_idx = logits.argmax(-1).item()
-            predicted_class = model_data['model'].config.id2label[predicted_class_idx]
-            confidence = probabilities[0][predicted_class_idx].item()
-            
-            return {
-                'analysis_type': 'violence',
-                'result': predicted_class,
-                'confidence': confidence,
-                'is_violent': predicted_class.lower() == 'violent',
-                'details': {
-                    'class': predicted_class,
-                    'confidence': confidence
-                }
-            }
-            
-        except Exception as e:
-            logger.error(f"Erreur analyse violence: {e}")
-            return None
-            
-    def analyze_fire(self, image):
-        """Analyse la présence de feu dans une image"""
-        try:
-            # Conversion en HSV pour détecter les couleurs de feu
-            hsv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2HSV)
-            
-            # Masques pour les couleurs de feu (rouge, orange, jaune)
-            lower_fire1 = np.array([0, 50, 50])
-            upper_fire1 = np.array([10, 255, 255])
-            lower_fire2 = np.array([170, 50, 50])
-            upper_fire2 = np.array([180, 255, 255])
-            
-            mask1 = cv2.inRange(hsv, lower_fire1, upper_fire1)
-            mask2 = cv2.inRange(hsv, lower_fire2, upper_fire2)
-            fire_mask = mask1 + mask2
-            
-            # Calculer le pourcentage de pixels de feu
-            fire_percentage = np.sum(fire_mask > 0) / (fire_mask.shape[0] * fire_mask.shape[1])
-            
-            # Seuil pour considérer qu'il y a du feu
-            fire_threshold = 0.05  # 5% de l'image
-            
-            return {
-                'analysis_type': 'fire',
-                'result': 'fire' if fire_percentage > fire_threshold else 'no_fire',
-                'confidence': fire_percentage,
-                'is_fire': fire_percentage > fire_threshold,
-                'details': {
-                    'fire_percentage': fire_percentage,
-                    'threshold': fire_threshold
-                }
-            }
-            
-        except Exception as e:
-            logger.error(f"Erreur analyse feu: {e}")
-            return None
-            
-    def save_analysis_result(self, camera_id, image_path, analysis_results):
-        """Sauvegarde les résultats d'analyse en base"""
-        try:
-            connection = mysql.connector.connect(**self.db_config)
-            cursor = connection.cursor()
-            
-            # Insérer l'image
-            cursor.execute("""
-                INSERT INTO image (Date, URI)
-                VALUES (%s, %s)
-            """, (datetime.now(), image_path))
-            
-            image_id = cursor.lastrowid
-            
-            # Insérer les résultats d'analyse
-            for analysis in analysis_results:
-                # Déterminer le niveau de résultat selon le schéma existant
-                if analysis.get('is_violent', False) or analysis.get('is_fire', False):
-                    if analysis['confidence'] > 0.8:
-                        result_level = 'high'
-                    elif analysis['confidence'] > 0.6:
-                        result_level = 'medium'
-                    else:
-                        result_level = 'low'
+        # Une soumission par région distincte, pour tous les modèles qui la demandent
+        submissions = {}
+        for plugin, regions, _ in pending:
+            for box, image in regions:
+                submissions.setdefault(box, (image, []))[1].append(plugin.name)
+        futures = {box: self.inference_engine.submit(image, names) for box, (image, names) in submissions.items()}
+        
+        for plugin, regions, context in pending:
+            try:
+                predictions = [futures[box].result(timeout=self.inference_timeout)[plugin.name] for box, _ in regions]
+                results[plugin.name] = plugin.finish(camera_id, regions, predictions, context)
+            except Exception as e:
+                logger.error(f"Erreur analyse {plugin.name}: {e}")
+                results[plugin.name] = None
+            self.metrics.observe('analysis_seconds', time.perf_counter() - started[plugin.name],
+                                 camera=camera_id, analysis=plugin.name)
+                                 
+        return results
+        
+    def analyze(self, name, frame, camera_id=None):
+        """Exécute une seule analyse sur une frame BGR (ou une image PIL RGB)"""
+        if isinstance(frame, Image.Image):
+            frame = cv2.cvtColor(np.asarray(frame), cv2.COLOR_RGB2BGR)
+        return self.run_analyses(frame, camera_id, [self.plugins[name]]).get(name)
+        
+    def analyze_violence(self, frame, camera_id=None):
+        """
+        Analyse la violence dans une frame BGR (ou une image PIL RGB). Avec camera_id, seules
+        les K plus grandes zones en mouvement sont analysées (en un lot) puis fusionnées.
+        """
+        return self.analyze('violence', frame, camera_id)
+        
+    def analyze_fire(self, frame, camera_id=None):
+        """Analyse la présence de feu dans une frame BGR (ou une image PIL RGB)"""
+        return self.analyze('fire', frame, camera_id)
+        
+    def save_analysis_result(self, camera_id, image_path, analysis_results, when=None):
+        """Met en file les résultats d'analyse pour une sauvegarde groupée en base"""
+        # Date de la frame analysée si connue, sinon date de sauvegarde
+        now = when or datetime.now()
+        results = []
+        
+        for analysis in analysis_results:
+            # Déterminer le niveau de résultat selon le schéma existant
+            if analysis.get('is_positive', False):
+                if analysis['confidence'] > 0.8:
+                    result_level = 'high'
+                elif analysis['confidence'] > 0.6:
+                    result_level = 'medium'
                 else:
-                    result_level = 'nothing'
+                    result_level = 'low'
+            else:
+                result_level = 'nothing'
                 
-                cursor.execute("""
-                    INSERT INTO resultat_analyse (fk_image, fk_analyse, result, human_verification, 
-                                               is_resolved, date)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
-                    image_id,
-                    1,  # ID de l'analyse (à adapter selon vos besoins)
-                    result_level,
-                    False,  # Pas encore vérifié par un humain
-                    False,  # Pas encore résolu
-                    datetime.now()
-                ))
-                
-            connection.commit()
-            cursor.close()
-            connection.close()
-            
-            logger.info(f"Analyse sauvegardée pour caméra {camera_id}")
+            # ID de l'analyse d'après le registre (jamais deviné)
+            registered = self.analysis_registry.get(analysis.get('analysis_type'))
+            if registered is None:
+                logger.error(f"Analyse '{analysis.get('analysis_type')}' absente de la table analyse, "
+                             f"résultat non sauvegardé")
+                continue
+            results.append((
+                registered['id'],
+                result_level,
+                now
+            ))
             
-        except Error as e:
-            logger.error(f"Erreur sauvegarde analyse: {e}")
+        if results and self.result_writer.submit(now, image_path, results):
+            logger.debug(f"Analyse mise en file pour caméra {camera_id}")
             
-    def process_camera_stream(self, camera):
-        """Traite le flux vidéo d'une caméra"""
+    def process_camera_stream(self, camera, stop_event=None):
+        """Traite le flux vidéo d'une caméra jusqu'à stop_event (bloquant)"""
         camera_id = camera['id']
-        rtsp_url = f"rtsp://{camera['username']}:{camera['password']}@{camera['ip_address']}/live0"
+        # Sous-flux live0 (pleine résolution), live1/live2 (réduits); fichier local possible pour les tests
+        source = self.stream_template.format(
+            stream=self.capture_stream, user=camera['username'], ip=camera['ip_address'], **camera
+        )
         
-        logger.info(f"Démarrage analyse caméra {camera_id}: {camera['name']}")
+        logger.info(f"Démarrage analyse caméra {camera_id}: {camera['ip_address']}")
         
         cap = None
-        last_frame_times = {}
+        grabber = None
+        stop_event = stop_event or threading.Event()
         
         try:
-            cap = cv2.VideoCapture(rtsp_url)
+            cap = open_capture(source, **self.capture_config)
             
-    if not cap.isOpened():
+            if not cap.isOpened():
                 logger.error(f"Impossible d'ouvrir le flux caméra {camera_id}")
                 self.update_camera_status(camera_id, 'error')
-        return
+                return
 
             self.update_camera_status(camera_id, 'connected')
             
+            # Le décodage tourne au rythme du flux dans son propre thread
+            grabber = FrameGrabber(cap, camera_id, self.frame_buffer_size, self.max_read_errors)
+            grabber.start()
+            self.frame_grabbers[camera_id] = grabber
+            
             frame_count = 0
             
-            while self.running:
-                ret, frame = cap.read()
+            metrics = self.metrics
+            while self.running and not stop_event.is_set():
+                # Toujours analyser la frame la plus récente
+                with metrics.timer('stage_seconds', camera=camera_id, stage='wait'):
+                    seq, frame = grabber.latest(timeout=1.0)
                 
-            if not ret:
-                    logger.warning(f"Impossible de lire la frame caméra {camera_id}")
-                time.sleep(1)
-                continue
+                if frame is None:
+                    # Flux coupé ou figé: rendre la main au superviseur (relance avec délai)
+                    if not grabber.is_alive():
+                        logger.warning(f"Flux interrompu caméra {camera_id}")
+                        break
+                    if grabber.stalled(self.stall_timeout):
+                        logger.warning(f"Aucune frame depuis {self.stall_timeout:.0f}s caméra {camera_id}")
+                        break
+                    continue
 
                 frame_count += 1
                 current_time = time.time()
+                metrics.inc('frames_total', camera=camera_id)
                 
                 # Détection de mouvement
-                movement_detected = self.detect_movement(frame, camera_id)
+                with metrics.timer('stage_seconds', camera=camera_id, stage='motion'):
+                    movement_detected = self.detect_movement(frame, camera_id)
                 
-                # Analyses conditionnelles basées sur le mouvement
+                # Analyses conditionnelles basées sur le mouvement (registre en mémoire)
                 analyses_to_perform = []
                 
-                if movement_detected:
-                    # Si mouvement détecté, effectuer toutes les analyses
-                    for analysis_type, config in self.analysis_config.items():
-                        if analysis_type == 'movement':
+                with metrics.timer('stage_seconds', camera=camera_id, stage='schedule'):
+                    for analysis_type, config in self.analysis_registry.active().items():
+                        # Sans mouvement, seules les analyses marquées (feu) sont effectuées
+                        if not movement_detected and not config['run_without_movement']:
                             continue
-
-                        last_time = last_frame_times.get(analysis_type, 0)
-                        if current_time - last_time >= (1.0 / config['fps']):
-                            analyses_to_perform.append(analysis_type)
-                            last_frame_times[analysis_type] = current_time
-                else:
-                    # Sinon, seulement analyse de feu (moins fréquente)
-                    last_time = last_frame_times.get('fire', 0)
-                    if current_time - last_time >= (1.0 / self.analysis_config['fire']['fps']):
-                        analyses_to_perform.append('fire')
-                        last_frame_times['fire'] = current_time
+                            
+                        # Fréquence ajustée par l'ordonnanceur global (mouvement, positifs, budget)
+                        if self.analysis_scheduler.due(camera_id, analysis_type, config['fps'], current_time):
+                            analyses_to_perform.append(config)
                 
-                # Effectuer les analyses
+                # Effectuer les analyses (une passe, batch commun aux analyses à modèle)
                 if analyses_to_perform:
-                    # Convertir frame OpenCV en PIL Image
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    pil_image = Image.fromarray(rgb_frame)
-                    
-                    analysis_results = []
+                    with metrics.timer('stage_seconds', camera=camera_id, stage='analysis'):
+                        plugins = [config['plugin'] for config in analyses_to_perform]
+                        results = self.run_analyses(frame, camera_id, plugins)
+                    analysis_results = [result for result in results.values() if result]
                     
-                    for analysis_type in analyses_to_perform:
-                        if analysis_type == 'violence':
-                            result = self.analyze_violence(pil_image)
-                        elif analysis_type == 'fire':
-                            result = self.analyze_fire(pil_image)
-                        else:
-                            continue
-
-                        if result:
-                            analysis_results.append(result)
+                    # Ne persister que les résultats qui lèvent (ou documentent) une alerte
+                    results_to_save = []
+                    for result in analysis_results:
+                        is_positive = result.get('is_positive', False)
+                        metrics.inc('analyses_total', camera=camera_id, analysis=result['analysis_type'],
+                                    result='positive' if is_positive else 'negative')
+                        self.analysis_scheduler.record_result(camera_id, is_positive, current_time)
+                        required = (self.analysis_registry.get(result['analysis_type']) or {}).get('required', 1)
+                        event = self.alert_aggregator.update(
+                            camera_id, result['analysis_type'], is_positive, required, current_time
+                        )
+                        if event == 'raise':
+                            logger.warning(f"Alerte {result['analysis_type']} caméra {camera_id} "
+                                           f"(confiance {result['confidence']:.2f})")
+                        elif event == 'clear':
+                            logger.info(f"Fin d'alerte {result['analysis_type']} caméra {camera_id}")
+                        if event in ('raise', 'snapshot'):
+                            results_to_save.append(result)
                     
-                    # Sauvegarder si des analyses ont été effectuées
                     if analysis_results:
-                        # Sauvegarder l'image
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        image_filename = f"camera_{camera_id}_{timestamp}.jpg"
-                        image_path = f"/app/storage/images/{image_filename}"
-                        
-                        # Créer le dossier si nécessaire
-                        os.makedirs(os.path.dirname(image_path), exist_ok=True)
-                        
-                        # Sauvegarder l'image
-                        cv2.imwrite(image_path, frame)
-                        
-                        # Sauvegarder les résultats
-                        self.save_analysis_result(camera_id, image_path, analysis_results)
-                        
                         # Mettre à jour le temps de dernière frame
                         self.update_camera_status(camera_id, 'connected', current_time)
+                    
+                    # Sauvegarder si une alerte est levée
+                    if results_to_save:
+                        with metrics.timer('stage_seconds', camera=camera_id, stage='persist'):
+                            # Sauvegarder l'image (asynchrone: l'URI n'est enregistré qu'une fois l'image écrite)
+                            frame_date = datetime.fromtimestamp(current_time)
+                            image_future = self.image_writer.submit(camera_id, frame, frame_date)
+                            
+                            # Résultats sauvegardés avec l'image (abandonnés si elle n'a pas pu être écrite)
+                            self.save_analysis_result(camera_id, image_future, results_to_save, frame_date)
                 
                 # Pause pour éviter la surcharge
-                time.sleep(0.1)
+                time.sleep(self.analysis_interval)
                 
         except Exception as e:
             logger.error(f"Erreur traitement caméra {camera_id}: {e}")
             self.update_camera_status(camera_id, 'error')
             
         finally:
+            # Arrêter le décodage avant de libérer le flux
+            if grabber:
+                grabber.stop()
+                # Un thread redémarré a pu déjà enregistrer son propre grabber
+                if self.frame_grabbers.get(camera_id) is grabber:
+                    del self.frame_grabbers[camera_id]
+                logger.info(f"Statistiques décodage caméra {camera_id}: {grabber.get_stats()}")
             if cap:
                 cap.release()
+            self.analysis_scheduler.forget(camera_id)
+            self.alert_aggregator.forget(camera_id)
+            # Caméra retirée ou désactivée: ne pas réécrire son dernier statut
+            if stop_event.is_set() and self.running:
+                self.camera_heartbeat.forget(camera_id)
+            cache_stats = self.result_cache.get_stats(camera_id)
+            if cache_stats:
+                logger.info(f"Cache de résultats caméra {camera_id}: {cache_stats}")
+            for plugin in self.plugins.values():
+                plugin.forget(camera_id)
             logger.info(f"Arrêt analyse caméra {camera_id}")
             
+    def collect_metrics(self):
+        """Jauges lues à l'exposition: vivacité des caméras, compteurs de décodage, files d'attente"""
+        gauges = []
+        for camera_id, state in self.camera_supervisor.status().items():
+            gauges.append(('camera_thread_up', {'camera': camera_id}, state['running']))
+            gauges.append(('camera_restarts', {'camera': camera_id}, state['restarts']))
+        for camera_id, stats in self.get_camera_stats().items():
+            for key in ('decoded_frames', 'dropped_frames', 'read_errors', 'alive'):
+                gauges.append((f'grabber_{key}', {'camera': camera_id}, stats[key]))
+        for camera_id, stats in self.get_cache_stats().items():
+            gauges.append(('result_cache_hit_rate', {'camera': camera_id}, stats['hit_rate']))
+        for camera_id, camera in self.get_schedule()['cameras'].items():
+            for analysis_type, decision in camera['analyses'].items():
+                gauges.append(('scheduled_fps', {'camera': camera_id, 'analysis': analysis_type},
+                               decision['granted_fps']))
+        for name, component in (('result_writer', self.result_writer), ('image_writer', self.image_writer),
+                                ('inference', self.inference_engine)):
+            if component is None:
+                continue
+            for key, value in component.get_stats().items():
+                if isinstance(value, (int, float)):
+                    gauges.append((f'{name}_{key}', {}, value))
+        gauges.append(('active_alerts', {}, len(self.alert_aggregator.active_alerts())))
+        if self.cluster and self.cluster.table_ready:
+            for key, value in self.cluster.get_stats().items():
+                gauges.append((f'cluster_{key}', {}, value))
+        return gauges
+        
+    def get_camera_stats(self):
+        """Retourne les compteurs de décodage (frames décodées / perdues) par caméra"""
+        return {camera_id: grabber.get_stats() for camera_id, grabber in list(self.frame_grabbers.items())}
+        
+    def get_cache_stats(self):
+        """Retourne le taux de réutilisation des résultats par caméra"""
+        return self.result_cache.get_stats()
+        
+    def get_schedule(self):
+        """Retourne les décisions de l'ordonnanceur (fréquences accordées par caméra)"""
+        return self.analysis_scheduler.get_decisions()
+        
+    def stop_camera(self, camera_id, timeout=5):
+        """Arrête le traitement d'une caméra et attend sa fin"""
+        self.camera_supervisor.stop_camera(camera_id, timeout)
+        
+    def reconcile_cameras(self, cameras):
+        """
+        Démarre les nouvelles caméras, arrête les caméras retirées, redémarre celles dont
+        la configuration a changé; les autres sont inchangées (les relances sur erreur sont
+        gérées par le superviseur).
+        """
+        fingerprints = {
+            camera['id']: (camera['ip_address'], camera['username'], camera['password'], camera.get('model'))
+            for camera in cameras
+        }
+        self.camera_supervisor.reconcile(cameras, fingerprints)
+            
+    def start_worker(self, worker_index):
+        """Lance (ou relance) un processus d'analyse pour un groupe de caméras"""
+        context = multiprocessing.get_context('spawn')
+        commands = context.Queue()
+        process = context.Process(
+            target=run_camera_worker,
+            args=(worker_index, self.num_workers, commands),
+            name=f'analyzer-worker-{worker_index}',
+            daemon=True
+        )
+        process.start()
+        self.workers[worker_index] = (process, commands)
+        logger.info(f"Processus d'analyse {worker_index} démarré (pid {process.pid})")
+        
+    def dispatch_cameras(self, cameras):
+        """Répartit les caméras sur les processus (id % N) et relance les processus morts"""
+        shards = {worker_index: [] for worker_index in range(self.num_workers)}
+        for camera in cameras:
+            shards[camera['id'] % self.num_workers].append(camera)
+            
+        for worker_index, shard in shards.items():
+            process, _ = self.workers.get(worker_index, (None, None))
+            if process is None or not process.is_alive():
+                if process is not None:
+                    logger.warning(f"Processus d'analyse {worker_index} arrêté (code {process.exitcode}), redémarrage")
+                self.start_worker(worker_index)
+            self.workers[worker_index][1].put(shard)
+            
+    def start_metrics(self, worker_index=None):
+        """Démarre l'export des métriques (port et fichier propres à chaque processus d'analyse)"""
+        port = int(os.getenv('METRICS_PORT', 9108))
+        textfile = os.getenv('METRICS_TEXTFILE', '')
+        if worker_index is not None:
+            port = port + 1 + worker_index if port else 0
+            if textfile:
+                root, extension = os.path.splitext(textfile)
+                textfile = f'{root}_worker{worker_index}{extension}'
+        self.metrics.start(port, textfile, float(os.getenv('METRICS_INTERVAL', 15)))
+        
+    def run_camera_worker(self, commands, worker_index=None):
+        """Boucle d'un processus d'analyse: applique les listes de caméras reçues"""
+        self.start_metrics(worker_index)
+        if self.preload_models:
+            threading.Thread(target=self.ensure_models, name='model-preload', daemon=True).start()
+            
+        while self.running:
+            self.analysis_registry.refresh()
+            try:
+                cameras = commands.get(timeout=1)
+            except queue.Empty:
+                continue
+            if cameras is None:
+                break
+            self.reconcile_cameras(cameras)
+            
     def start_analysis(self):
         """Démarre l'analyse pour toutes les caméras"""
         logger.info("Démarrage du système d'analyse vidéo")
+        self.start_metrics()
+        if self.num_workers > 0:
+            logger.info(f"Mode multi-processus: {self.num_workers} processus d'analyse")
+        elif self.preload_models:
+            # Chargement en arrière-plan pendant la connexion aux caméras
+            threading.Thread(target=self.ensure_models, name='model-preload', daemon=True).start()
         
         while self.running:
             try:
-                cameras = self.get_cameras()
+                self.analysis_registry.refresh()
                 
-                # Démarrer les threads pour les nouvelles caméras
-                for camera in cameras:
-                    camera_id = camera['id']
-                    
-                    if camera_id not in self.active_threads or not self.active_threads[camera_id].is_alive():
-                        thread = threading.Thread(
-                            target=self.process_camera_stream,
-                            args=(camera,),
-                            daemon=True
-                        )
-                        thread.start()
-                        self.active_threads[camera_id] = thread
-                        logger.info(f"Thread démarré pour caméra {camera_id}")
+                # Relire et déchiffrer les caméras seulement si le marqueur a changé
+                marker = self.get_camera_marker()
+                if marker is not None and marker != self.camera_marker:
+                    cameras = self.get_cameras()
+                    # Liste vide alors que des caméras existent: erreur de lecture, on garde l'état
+                    if cameras or not marker[0]:
+                        self.cameras = cameras
+                        self.camera_marker = marker
+                        logger.info(f"Changement détecté: {len(cameras)} caméras actives")
+                cameras = self.cameras
+                
+                # Mode grappe: ne garder que les caméras attribuées à ce nœud
+                if self.cluster:
+                    self.cluster.heartbeat()
+                    cameras = self.cluster.shard(cameras)
                 
-                # Nettoyer les threads morts
-                dead_threads = [cam_id for cam_id, thread in self.active_threads.items() 
-                               if not thread.is_alive()]
-                for cam_id in dead_threads:
-                    del self.active_threads[cam_id]
+                # Démarrer les nouvelles caméras (ou les répartir sur les processus)
+                if self.num_workers > 0:
+                    self.dispatch_cameras(cameras)
+                else:
+                    self.reconcile_cameras(cameras)
+                    logger.debug(f"Ordonnancement des analyses: {self.get_schedule()}")
                 
                 time.sleep(10)  # Vérifier toutes les 10 secondes
                 
@@ -417,13 +3329,55 @@ class VideoAnalyzer:
         logger.info("Arrêt du système d'analyse")
         self.running = False
         
-        # Attendre que tous les threads se terminent
-        for thread in self.active_threads.values():
-            thread.join(timeout=5)
+        # Demander l'arrêt aux processus d'analyse, puis arrêter les caméras en parallèle
+        for process, commands in self.workers.values():
+            commands.put(None)
+            
+        self.camera_supervisor.stop(timeout=float(os.getenv('SUPERVISOR_STOP_TIMEOUT', 15)))
+        if self.cluster:
+            self.cluster.leave()
+            
+        for worker_index, (process, _) in self.workers.items():
+            process.join(timeout=15)
+            if process.is_alive():
+                logger.warning(f"Processus d'analyse {worker_index} forcé à s'arrêter")
+                process.terminate()
+            
+        # Arrêter le moteur d'inférence une fois les caméras arrêtées
+        if self.inference_engine:
+            logger.info(f"Statistiques inférence: {self.inference_engine.get_stats()}")
+            self.inference_engine.stop()
+            
+        # Vider les files d'écriture avant de fermer les connexions
+        self.image_writer.stop()
+        logger.info(f"Statistiques images: {self.image_writer.get_stats()}")
+        self.camera_heartbeat.stop()
+        self.result_writer.stop()
+        logger.info(f"Statistiques écriture: {self.result_writer.get_stats()}")
+        self.metrics.stop()
+        self.db_pool.close()
+
+def run_camera_worker(worker_index, num_workers, commands):
+    """Point d'entrée d'un processus d'analyse (copie locale des modèles)"""
+    # Partager les cœurs entre processus plutôt que de les sursouscrire; appliqué par le
+    # moteur d'inférence, torch n'est importé qu'au chargement des modèles
+    if not int(os.getenv('INFERENCE_THREADS', 0)):
+        os.environ['INFERENCE_THREADS'] = str(max(1, (os.cpu_count() or 1) // num_workers))
+        
+    analyzer = VideoAnalyzer()
+    logger.info(f"Processus d'analyse {worker_index} prêt")
+    
+    try:
+        analyzer.run_camera_worker(commands, worker_index)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        analyzer.stop()
 
 def main():
     """Fonction principale"""
-    analyzer = VideoAnalyzer()
+    # En mode multi-processus, le processus principal ne charge pas les modèles
+    analyzer = VideoAnalyzer(with_models=int(os.getenv('ANALYZER_WORKERS', 0)) <= 0)
     
     try:
         analyzer.start_analysis()
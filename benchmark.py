@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks de l'analyseur vidéo sur des clips enregistrés
+Usage: python benchmark.py motion clip1.mp4 clip2.mp4 [--width 320] [--frames 500]
+       python benchmark.py backend clip.mp4 [--backends eager torchscript onnx] [--quantize]
+       python benchmark.py preprocess clip.mp4 [--batch-size 16]
+       python benchmark.py pipeline clip1.mp4 clip2.mp4 [--cameras 4] [--duration 30] [--output run.json]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from analyzer import FramePreprocessor, MotionDetector, create_inference_backend
+
+
+def synthetic_clip(path, frames=300, width=1920, height=1080, fps=25, color=(200, 200, 200), object_scale=8):
+    """Génère un clip de test: fond bruité fixe et un objet qui traverse l'image"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 60, (height, width, 3), dtype=np.uint8)
+
+    for i in range(frames):
+        frame = background.copy()
+        # Objet en mouvement sur la moitié du clip, scène statique sinon
+        if (i // (frames // 4 or 1)) % 2 == 1:
+            x = int((i * 17) % width)
+            cv2.rectangle(frame, (x, height // 3), (min(width - 1, x + width // object_scale), height // 2), color, -1)
+        writer.write(frame)
+
+    writer.release()
+    return path
+
+
+def read_frames(path, max_frames):
+    """Décode au plus max_frames frames d'un clip (hors chronométrage)"""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def legacy_detect_movement(subtractor, frame):
+    """Chemin historique: MOG2 pleine résolution BGR + np.sum"""
+    fg_mask = subtractor.apply(frame)
+    movement_percentage = np.sum(fg_mask > 0) / (fg_mask.shape[0] * fg_mask.shape[1])
+    return movement_percentage > 0.01
+
+
+def bench_motion(args):
+    """Compare la détection de mouvement historique et le pipeline réduit"""
+    clips = list(args.clips)
+    if not clips:
+        clips = [synthetic_clip(os.path.join(tempfile.gettempdir(), 'bench_motion.avi'), frames=args.frames)]
+
+    for clip in clips:
+        frames = read_frames(clip, args.frames)
+        if not frames:
+            print(f"{clip}: aucune frame lisible")
+            continue
+
+        legacy = cv2.createBackgroundSubtractorMOG2()
+        start = time.perf_counter()
+        legacy_results = [legacy_detect_movement(legacy, frame) for frame in frames]
+        legacy_time = time.perf_counter() - start
+
+        detector = MotionDetector(width=args.width, threshold=args.threshold, frame_skip=args.frame_skip)
+        start = time.perf_counter()
+        new_results = [detector.apply(frame)[0] for frame in frames]
+        new_time = time.perf_counter() - start
+
+        agreement = sum(a == b for a, b in zip(legacy_results, new_results)) / len(frames)
+        height, width = frames[0].shape[:2]
+
+        print(f"{clip} ({len(frames)} frames {width}x{height})")
+        print(f"  historique : {legacy_time / len(frames) * 1000:7.2f} ms/frame, "
+              f"{sum(legacy_results)} frames en mouvement")
+        print(f"  réduit     : {new_time / len(frames) * 1000:7.2f} ms/frame, "
+              f"{sum(new_results)} frames en mouvement (largeur {args.width}, saut {args.frame_skip})")
+        print(f"  accélération x{legacy_time / new_time:.1f}, accord {agreement:.1%}")
+
+
+def bench_backend(args):
+    """Compare précision et latence des backends d'inférence face au modèle eager FP32"""
+    import torch
+    from transformers import ViTForImageClassification, ViTFeatureExtractor
+
+    model = ViTForImageClassification.from_pretrained(args.model).eval()
+    feature_extractor = ViTFeatureExtractor.from_pretrained(args.model)
+
+    # Jeu d'évaluation: frames des clips (ou bruit aléatoire à défaut)
+    frames = []
+    for clip in args.clips:
+        frames.extend(read_frames(clip, args.frames - len(frames)))
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(args.frames)]
+    images = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+    pixel_values = feature_extractor(images=images, return_tensors="pt")['pixel_values']
+
+    reference = create_inference_backend(model, args.model, 'eager', cache_dir=args.cache_dir)
+    reference_logits = torch.cat([reference(batch) for batch in pixel_values.split(args.batch_size)])
+    reference_classes = reference_logits.argmax(-1)
+
+    print(f"{len(frames)} images, batch {args.batch_size}, threads torch {torch.get_num_threads()}")
+    print(f"{'backend':<20} {'accord':>8} {'écart max':>10} {'lat. b=1':>10} {'débit img/s':>12}")
+
+    for kind in args.backends:
+        for quantize in ([False, True] if args.quantize else [False]):
+            backend = create_inference_backend(model, args.model, kind, quantize, cache_dir=args.cache_dir)
+            label = f"{backend.name}{'-int8' if quantize else ''}"
+            if backend.name != kind:
+                print(f"{kind:<20} indisponible (repli sur {backend.name})")
+                continue
+
+            # Préchauffage (compilation JIT, allocation des sessions)
+            backend(pixel_values[:1])
+            backend(pixel_values[:args.batch_size])
+
+            start = time.perf_counter()
+            for i in range(min(len(frames), 20)):
+                backend(pixel_values[i:i + 1])
+            single_latency = (time.perf_counter() - start) / min(len(frames), 20)
+
+            start = time.perf_counter()
+            logits = torch.cat([backend(batch) for batch in pixel_values.split(args.batch_size)])
+            throughput = len(frames) / (time.perf_counter() - start)
+
+            agreement = (logits.argmax(-1) == reference_classes).float().mean().item()
+            max_diff = (logits.float() - reference_logits).abs().max().item()
+            print(f"{label:<20} {agreement:>8.1%} {max_diff:>10.4f} {single_latency * 1000:>8.1f}ms {throughput:>12.1f}")
+
+
+def bench_preprocess(args):
+    """Compare le ViTFeatureExtractor (PIL) et le prétraitement vectorisé OpenCV/NumPy"""
+    from PIL import Image
+    from transformers import ViTFeatureExtractor
+
+    feature_extractor = ViTFeatureExtractor.from_pretrained(args.model)
+    preprocessor = FramePreprocessor.from_feature_extractor(feature_extractor, args.batch_size, args.exact_resize)
+
+    frames = []
+    for clip in args.clips or [synthetic_clip(os.path.join(tempfile.gettempdir(), 'bench_motion.avi'))]:
+        frames.extend(read_frames(clip, args.frames - len(frames)))
+    batches = [frames[i:i + args.batch_size] for i in range(0, len(frames), args.batch_size)]
+
+    # Chemin historique: BGR -> RGB -> PIL -> extracteur HF
+    start = time.perf_counter()
+    reference = []
+    for batch in batches:
+        images = [Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)) for frame in batch]
+        reference.append(feature_extractor(images=images, return_tensors="np")['pixel_values'])
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    max_diff = mean_diff = 0.0
+    for batch, expected in zip(batches, reference):
+        pixel_values = preprocessor(batch).numpy()
+        diff = np.abs(pixel_values - expected)
+        max_diff = max(max_diff, float(diff.max()))
+        mean_diff += float(diff.mean()) * len(batch)
+    new_time = time.perf_counter() - start
+    height, width = frames[0].shape[:2]
+
+    print(f"{len(frames)} frames {width}x{height}, batch {args.batch_size}")
+    print(f"  ViTFeatureExtractor : {legacy_time / len(frames) * 1000:7.2f} ms/frame")
+    print(f"  vectorisé           : {new_time / len(frames) * 1000:7.2f} ms/frame (comparaison incluse)")
+    print(f"  écart max {max_diff:.4f} ({max_diff * 127.5:.1f} niveaux), écart moyen {mean_diff / len(frames):.5f}")
+
+
+class FakeDatabase:
+    """
+    Remplace le pool MariaDB: table analyse en mémoire, écritures acceptées et horodatées
+    pour mesurer la latence frame -> base (date de la frame -> INSERT du résultat)
+    """
+
+    def __init__(self, analyses):
+        self.analyses = [{'id': i + 1, 'name': name, 'required': 1} for i, name in enumerate(analyses)]
+        self.lock = threading.Lock()
+        self.next_id = 1
+        self.images = 0
+        self.latencies = []
+
+    @contextmanager
+    def connection(self):
+        yield FakeConnection(self)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self.database)
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, database):
+        self.database = database
+        self.rows = []
+        self.lastrowid = None
+
+    def execute(self, query, params=None):
+        self.rows = [dict(row) for row in self.database.analyses] if 'FROM analyse' in query else []
+        if 'INTO image' in query:
+            with self.database.lock:
+                self.lastrowid = self.database.next_id
+                self.database.next_id += 1
+                self.database.images += 1
+
+    def executemany(self, query, rows):
+        now = datetime.now()
+        with self.database.lock:
+            if 'INTO resultat_analyse' in query:
+                self.database.latencies.extend((now - row[5]).total_seconds() for row in rows)
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def close(self):
+        pass
+
+
+class ReplayCapture:
+    """Rejoue un fichier en boucle, au rythme nominal du clip (comme une caméra) sauf pace=False"""
+
+    def __init__(self, cap, pace=True):
+        self.cap = cap
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self.period = 1.0 / fps if pace else 0.0
+        self.next_time = time.perf_counter()
+
+    def read(self, image=None):
+        if self.period:
+            delay = self.next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_time = max(self.next_time + self.period, time.perf_counter() - self.period)
+        ret, frame = self.cap.read(image)
+        if not ret:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(image)
+        return ret, frame
+
+    def grab(self):
+        return self.read()[0]
+
+    def __getattr__(self, name):
+        return getattr(self.cap, name)
+
+
+def resident_memory_mb():
+    """Mémoire résidente courante du processus (pic à défaut de /proc)"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentiles(values, scale=1000.0):
+    """p50/p95/max (en ms par défaut) d'une liste de durées en secondes"""
+    if not values:
+        return None
+    values = np.asarray(values) * scale
+    return {'p50': round(float(np.percentile(values, 50)), 2),
+            'p95': round(float(np.percentile(values, 95)), 2),
+            'max': round(float(values.max()), 2)}
+
+
+def bench_pipeline(args):
+    """Rejoue des clips comme caméras factices dans VideoAnalyzer (base factice, sans réseau)"""
+    workdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    clips = list(args.clips)
+    if not clips:
+        # Objet couleur feu sur la moitié du clip: déclenche des résultats positifs et des écritures
+        clips = [synthetic_clip(os.path.join(workdir, 'synthetic.avi'), frames=250, width=args.width,
+                                height=args.width * 9 // 16, color=(0, 80, 255), object_scale=3)]
+
+    # Configuration de l'analyseur avant sa création: tout positif est persisté
+    os.environ.update({
+        'STORAGE_DIR': os.path.join(workdir, 'images'),
+        'STREAM_TEMPLATE': '{source}',
+        'ALERT_SNAPSHOT_INTERVAL': '0',
+        # Démarrage immédiat de toutes les caméras: le débit mesuré reste comparable entre commits
+        'SUPERVISOR_START_JITTER': '0',
+        'MODEL_PRELOAD': '0',
+    })
+    if args.fps:
+        os.environ['HF_MODELS'] = json.dumps({'violence:fps': args.fps, 'fire:fps': args.fps})
+
+    import analyzer as analyzer_module
+    open_capture = analyzer_module.open_capture
+    analyzer_module.open_capture = lambda source, **kwargs: ReplayCapture(
+        open_capture(source, **kwargs), pace=not args.no_pace
+    )
+
+    database = FakeDatabase(['violence', 'fire'])
+    analyzer = analyzer_module.VideoAnalyzer(db_pool=database)
+
+    # Temps passé dans la détection de mouvement, par caméra
+    motion_times = {}
+    detect_movement = analyzer.detect_movement
+
+    def timed_detect_movement(frame, camera_id):
+        start = time.perf_counter()
+        try:
+            return detect_movement(frame, camera_id)
+        finally:
+            motion_times.setdefault(camera_id, []).append(time.perf_counter() - start)
+    analyzer.detect_movement = timed_detect_movement
+
+    # Modèles chargés hors mesure, mémoire de référence avant les caméras
+    analyzer.ensure_models()
+    analyzer.analysis_registry.refresh(force=True)
+    baseline_memory = resident_memory_mb()
+
+    cameras = [{'id': i + 1, 'ip_address': f'replay-{i + 1}', 'username': '', 'password': '',
+                'model': None, 'source': clips[i % len(clips)]} for i in range(args.cameras)]
+    start = time.perf_counter()
+    analyzer.reconcile_cameras(cameras)
+    time.sleep(args.duration)
+    elapsed = time.perf_counter() - start
+
+    camera_stats = analyzer.get_camera_stats()
+    schedule = analyzer.get_schedule()
+    peak_memory = resident_memory_mb()
+    analyzer.stop()
+
+    report = {
+        'commit': subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                 cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'cameras': args.cameras,
+        'duration': round(elapsed, 1),
+        'paced': not args.no_pace,
+        'decode_fps': {cam_id: round(stats['decoded_frames'] / elapsed, 1) for cam_id, stats in camera_stats.items()},
+        'motion_ms': {cam_id: percentiles(times) for cam_id, times in motion_times.items()},
+        'analyses': {cam_id: {name: entry['runs'] for name, entry in camera['analyses'].items()}
+                     for cam_id, camera in schedule['cameras'].items()},
+        'inference': analyzer.inference_engine.get_stats() if analyzer.inference_engine else None,
+        'frame_to_db_ms': percentiles(database.latencies),
+        'db_results': len(database.latencies),
+        'memory_mb_per_camera': round((peak_memory - baseline_memory) / max(1, args.cameras), 1),
+    }
+
+    print(json.dumps(report, indent=2, default=str))
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, default=str)
+
+    if args.compare:
+        with open(args.compare) as previous_file:
+            previous = json.load(previous_file)
+        print(f"\nComparaison {previous.get('commit')} -> {report['commit']}")
+
+        def mean(values):
+            values = [v for v in values if v is not None]
+            return sum(values) / len(values) if values else None
+
+        metrics = {
+            'décodage (fps/caméra)': lambda r: mean(list(r['decode_fps'].values())),
+            'mouvement p50 (ms)': lambda r: mean([p and p['p50'] for p in r['motion_ms'].values()]),
+            'frame -> base p95 (ms)': lambda r: r['frame_to_db_ms'] and r['frame_to_db_ms']['p95'],
+            'mémoire/caméra (Mo)': lambda r: r['memory_mb_per_camera'],
+        }
+        for label, metric in metrics.items():
+            before, after = metric(previous), metric(report)
+            if before is None or after is None:
+                print(f"  {label:<26} {before} -> {after}")
+            else:
+                change = (after - before) / before if before else 0.0
+                print(f"  {label:<26} {before:10.2f} -> {after:10.2f} ({change:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de l'analyseur vidéo")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    motion = subparsers.add_parser('motion', help="Détection de mouvement historique vs réduite")
+    motion.add_argument('clips', nargs='*', help="Clips vidéo (clip synthétique 1080p si vide)")
+    motion.add_argument('--frames', type=int, default=300)
+    motion.add_argument('--width', type=int, default=320)
+    motion.add_argument('--threshold', type=float, default=0.01)
+    motion.add_argument('--frame-skip', type=int, default=0)
+    motion.set_defaults(func=bench_motion)
+
+    backend = subparsers.add_parser('backend', help="Précision et latence des backends d'inférence violence")
+    backend.add_argument('clips', nargs='*', help="Clips vidéo (images aléatoires si vide)")
+    backend.add_argument('--model', default='jaranohaal/vit-base-violence-detection')
+    backend.add_argument('--backends', nargs='+', default=['eager', 'torchscript', 'onnx'])
+    backend.add_argument('--quantize', action='store_true', help="Tester aussi les variantes INT8")
+    backend.add_argument('--frames', type=int, default=64)
+    backend.add_argument('--batch-size', type=int, default=16)
+    backend.add_argument('--cache-dir', default=os.getenv('MODEL_CACHE_DIR', 'storage/models'))
+    backend.set_defaults(func=bench_backend)
+
+    preprocess = subparsers.add_parser('preprocess', help="ViTFeatureExtractor vs prétraitement vectorisé")
+    preprocess.add_argument('clips', nargs='*', help="Clips vidéo (clip synthétique 1080p si vide)")
+    preprocess.add_argument('--model', default='jaranohaal/vit-base-violence-detection')
+    preprocess.add_argument('--frames', type=int, default=128)
+    preprocess.add_argument('--batch-size', type=int, default=16)
+    preprocess.add_argument('--exact-resize', action='store_true', help="Filtre de redimensionnement PIL")
+    preprocess.set_defaults(func=bench_preprocess)
+
+    pipeline = subparsers.add_parser('pipeline', help="Clips rejoués comme caméras dans VideoAnalyzer")
+    pipeline.add_argument('clips', nargs='*', help="Clips vidéo répartis sur les caméras (synthétique si vide)")
+    pipeline.add_argument('--cameras', type=int, default=4)
+    pipeline.add_argument('--duration', type=float, default=30.0, help="Durée de la mesure (s)")
+    pipeline.add_argument('--width', type=int, default=1280, help="Largeur du clip synthétique")
+    pipeline.add_argument('--fps', type=float, default=0.0, help="Fréquence de base des analyses")
+    pipeline.add_argument('--no-pace', action='store_true', help="Décoder au plus vite plutôt qu'au rythme du clip")
+    pipeline.add_argument('--output', help="Enregistrer le rapport JSON")
+    pipeline.add_argument('--compare', help="Rapport JSON d'un autre commit à comparer")
+    pipeline.set_defaults(func=bench_pipeline)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
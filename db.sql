@@ -43,6 +43,14 @@ CREATE OR REPLACE TABLE `resultat_analyse` (
 
 CREATE INDEX `resultat_analyse_index_0`
 ON `resultat_analyse` (`fk_image`);
+CREATE OR REPLACE TABLE `analyzer_node` (
+	`node_id` VARCHAR(255) NOT NULL,
+	`capacity` DOUBLE NOT NULL DEFAULT 1,
+	`cameras` INTEGER NOT NULL DEFAULT 0,
+	`last_seen` DATETIME NOT NULL,
+	PRIMARY KEY(`node_id`)
+);
+
 CREATE OR REPLACE TABLE `Position` (
 	`id` INTEGER NOT NULL AUTO_INCREMENT UNIQUE,
 	`Latitude` DOUBLE NOT NULL,
@@ -0,0 +1,20 @@
+from analyzer import AlertAggregator
+
+
+def test_late_positive_after_decay_does_not_realert():
+    aggregator = AlertAggregator(window_seconds=30, decay_seconds=60, snapshot_interval=60)
+    events = [aggregator.update(1, 'violence', True, 3, now) for now in (0, 1, 2)]
+    assert events == [None, None, 'raise']
+    
+    # Un positif isolé longtemps après: fin de l'alerte, pas d'image ni de nouvelle alerte
+    assert aggregator.update(1, 'violence', True, 3, 10000) == 'clear'
+    assert aggregator.active_alerts() == []
+    assert aggregator.update(1, 'violence', True, 3, 10001) is None
+
+
+def test_forget_drops_camera_state():
+    aggregator = AlertAggregator()
+    aggregator.update(1, 'fire', True, 1, 0)
+    aggregator.update(2, 'fire', True, 1, 0)
+    aggregator.forget(1)
+    assert aggregator.active_alerts() == [(2, 'fire')]
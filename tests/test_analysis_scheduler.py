@@ -0,0 +1,46 @@
+from analyzer import AnalysisScheduler
+
+START = 1000.0
+
+
+def run(scheduler, cameras, seconds=60.0, step=0.01, base_fps=1.0, motion=None, hot=()):
+    """Interroge due() à intervalle régulier, retourne la fréquence obtenue par caméra"""
+    runs = {camera_id: 0 for camera_id in cameras}
+    for index in range(int(seconds / step)):
+        now = START + index * step
+        for camera_id in cameras:
+            scheduler.observe_motion(camera_id, (motion or {}).get(camera_id, 0.01), now)
+            if camera_id in hot:
+                scheduler.record_result(camera_id, True, now)
+            if scheduler.due(camera_id, 'violence', base_fps, now):
+                runs[camera_id] += 1
+    return {camera_id: count / seconds for camera_id, count in runs.items()}
+
+
+def test_unlimited_budget_keeps_base_rate_at_motion_threshold():
+    rates = run(AnalysisScheduler(motion_threshold=0.01), [1, 2])
+    assert all(abs(rate - 1.0) < 0.05 for rate in rates.values())
+
+
+def test_budget_caps_total_rate():
+    scheduler = AnalysisScheduler(budget_fps=2.0, motion_threshold=0.01)
+    rates = run(scheduler, [1, 2, 3, 4])
+    assert sum(rates.values()) <= 2.0 * 1.05
+    assert all(abs(rate - 0.5) < 0.05 for rate in rates.values())
+    assert abs(scheduler.budget_factor - 0.5) < 1e-9
+
+
+def test_hot_and_quiet_cameras_are_scaled():
+    scheduler = AnalysisScheduler(min_scale=0.5, max_scale=3.0, motion_threshold=0.01)
+    rates = run(scheduler, [1, 2, 3], motion={1: 0.0, 2: 0.01, 3: 0.0}, hot={3})
+    assert abs(rates[1] - 0.5) < 0.05  # calme: min_scale
+    assert abs(rates[2] - 1.0) < 0.05  # mouvement au seuil: fréquence de base
+    assert abs(rates[3] - 3.0) < 0.1   # positif récent: max_scale
+
+
+def test_budget_keeps_hot_camera_share():
+    scheduler = AnalysisScheduler(budget_fps=2.0, max_scale=3.0, motion_threshold=0.01)
+    rates = run(scheduler, [1, 2], hot={2})
+    # Demande 1 + 3 ramenée à 2: réduction proportionnelle
+    assert abs(rates[1] - 0.5) < 0.05
+    assert abs(rates[2] - 1.5) < 0.1
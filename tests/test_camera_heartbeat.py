@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+from analyzer import CameraHeartbeat
+
+
+class RecordingPool:
+    """Pool factice: enregistre les requêtes exécutées"""
+    
+    def __init__(self):
+        self.queries = []
+        
+    @contextmanager
+    def connection(self):
+        yield self
+        
+    def cursor(self):
+        return self
+        
+    def execute(self, query, params=None):
+        self.queries.append((' '.join(query.split()), params))
+        
+    def commit(self):
+        pass
+        
+    def close(self):
+        pass
+
+
+def test_flush_writes_one_guarded_update():
+    pool = RecordingPool()
+    heartbeat = CameraHeartbeat(pool)
+    seen = datetime(2026, 1, 1, 12, 0, 0)
+    heartbeat.update(7, 'connected', seen)
+    heartbeat.update(8, 'error', seen)
+    
+    assert heartbeat.flush()
+    [(query, params)] = pool.queries
+    assert query.startswith('UPDATE camera SET Status = CASE id WHEN %s THEN %s WHEN %s THEN %s END')
+    # Un opérateur qui désactive une caméra n'est jamais écrasé
+    assert query.endswith("WHERE id IN (%s, %s) AND Status IN ('active', 'error')")
+    assert params == [7, 'active', 8, 'error', 7, seen, 8, seen, 7, 8]
+    
+    # Rien en attente: pas de requête
+    assert heartbeat.flush()
+    assert len(pool.queries) == 1
+
+
+def test_forget_drops_pending_status():
+    pool = RecordingPool()
+    heartbeat = CameraHeartbeat(pool)
+    heartbeat.update(7, 'connected')
+    heartbeat.forget(7)
+    heartbeat.flush()
+    assert pool.queries == []
@@ -0,0 +1,72 @@
+import threading
+import time
+
+from analyzer import CameraSupervisor
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_every_camera_runs_concurrently():
+    entered = set()
+    lock = threading.Lock()
+    
+    def run(camera, stop_event):
+        with lock:
+            entered.add(camera['id'])
+        stop_event.wait()
+        
+    supervisor = CameraSupervisor(run, start_jitter=0)
+    cameras = [{'id': camera_id} for camera_id in range(200)]
+    supervisor.reconcile(cameras, {camera['id']: 1 for camera in cameras})
+    try:
+        assert wait_until(lambda: len(entered) == 200)
+        assert wait_until(lambda: all(state['running'] for state in supervisor.status().values()))
+    finally:
+        supervisor.stop(timeout=5)
+    assert not any(state['running'] for state in supervisor.status().values())
+
+
+def test_running_reflects_the_camera_thread():
+    runs = []
+    
+    def run(camera, stop_event):
+        runs.append(time.monotonic())
+        if len(runs) == 1:
+            raise RuntimeError('flux coupé')
+        stop_event.wait()
+        
+    supervisor = CameraSupervisor(run, backoff_base=0.5, backoff_max=0.5, start_jitter=0)
+    supervisor.reconcile([{'id': 1}], {1: 1})
+    try:
+        # Pendant le délai de relance, la caméra n'est pas en cours
+        assert wait_until(lambda: supervisor.status()[1]['next_start'] is not None)
+        assert supervisor.status()[1]['running'] is False
+        assert wait_until(lambda: supervisor.status()[1]['running'])
+        assert len(runs) == 2
+    finally:
+        supervisor.stop(timeout=5)
+
+
+def test_failing_camera_restarts_with_growing_delay():
+    runs = []
+    
+    def run(camera, stop_event):
+        runs.append(time.monotonic())
+        raise RuntimeError('flux coupé')
+        
+    supervisor = CameraSupervisor(run, backoff_base=0.05, backoff_max=10, start_jitter=0)
+    supervisor.reconcile([{'id': 1}], {1: 1})
+    try:
+        assert wait_until(lambda: len(runs) >= 4)
+        assert supervisor.status()[1]['restarts'] >= 3
+        # Délais 0.05 x 2^n, aléatoires x0.5-1.5: le troisième dépasse le premier
+        assert runs[3] - runs[2] > runs[1] - runs[0]
+    finally:
+        supervisor.stop(timeout=5)
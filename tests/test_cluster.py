@@ -0,0 +1,60 @@
+import math
+import random
+
+from analyzer import ClusterMembership
+
+CAMERAS = [{'id': camera_id} for camera_id in range(1, 201)]
+NODES = {'node-a': 1.0, 'node-b': 1.0, 'node-c': 1.0}
+
+
+def owners(shards):
+    return {camera['id']: node_id for node_id, cameras in shards.items() for camera in cameras}
+
+
+def test_assignment_is_identical_on_every_instance():
+    shuffled = random.Random(1).sample(CAMERAS, len(CAMERAS))
+    views = []
+    for node_id in NODES:
+        membership = ClusterMembership(None, node_id)
+        membership.nodes = dict(NODES)
+        views.append(owners(membership.assign(shuffled)))
+        
+    assert views[0] == views[1] == views[2]
+    assert len(views[0]) == len(CAMERAS)
+    
+    # Chaque instance ne garde que sa part, sans recouvrement
+    shards = []
+    for node_id in NODES:
+        membership = ClusterMembership(None, node_id)
+        membership.nodes = dict(NODES)
+        shards.append({camera['id'] for camera in membership.shard(CAMERAS)})
+        assert membership.assigned == len(shards[-1])
+    assert sum(map(len, shards)) == len(CAMERAS)
+    assert set().union(*shards) == {camera['id'] for camera in CAMERAS}
+
+
+def test_load_is_bounded_by_capacity_share():
+    nodes = {'node-a': 2.0, 'node-b': 1.0, 'node-c': 1.0}
+    for load_factor in (1.0, 1.25):
+        membership = ClusterMembership(None, 'node-a', load_factor=load_factor)
+        shards = membership.assign(CAMERAS, nodes)
+        assert sum(map(len, shards.values())) == len(CAMERAS)
+        for node_id, capacity in nodes.items():
+            limit = math.ceil(load_factor * len(CAMERAS) * capacity / sum(nodes.values()))
+            assert len(shards[node_id]) <= limit
+
+
+def test_join_and_leave_only_move_the_affected_cameras():
+    membership = ClusterMembership(None, 'node-a')
+    before = owners(membership.assign(CAMERAS, NODES))
+    
+    # Arrivée: seules des caméras reprises par le nouveau nœud changent de place
+    joined = owners(membership.assign(CAMERAS, {**NODES, 'node-d': 1.0}))
+    moved = [camera_id for camera_id in before if before[camera_id] != joined[camera_id]]
+    assert moved
+    assert all(joined[camera_id] == 'node-d' for camera_id in moved)
+    
+    # Départ: seules les caméras du nœud perdu changent de place
+    left = owners(membership.assign(CAMERAS, {'node-a': 1.0, 'node-c': 1.0}))
+    moved = [camera_id for camera_id in before if before[camera_id] != left[camera_id]]
+    assert sorted(moved) == sorted(camera_id for camera_id, node_id in before.items() if node_id == 'node-b')
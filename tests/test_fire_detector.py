@@ -0,0 +1,36 @@
+import cv2
+import numpy as np
+
+from analyzer import FireDetector
+
+RED = (0, 0, 255)
+
+
+def blob_frame(radius, extra=0):
+    """Frame 160x120 avec un disque rouge (cœur fixe) et un bord variable"""
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    cv2.circle(frame, (80, 60), radius, RED, -1)
+    if extra:
+        cv2.circle(frame, (80 + extra, 60 - extra), radius // 2, RED, -1)
+    return frame
+
+
+def test_sustained_flickering_fire_stays_detected():
+    detector = FireDetector(width=0, threshold=0.05, min_flicker=0.1, static_alpha=0.1)
+    results = []
+    for index in range(60):
+        # Cœur stable, bords qui changent à chaque observation
+        frame = blob_frame(20 + (index % 3) * 4, extra=(index % 2) * 15)
+        results.append(detector.detect(frame, camera_id=1, now=index * 10.0))
+        
+    assert results[0]['is_fire'] is False  # scintillement encore inconnu
+    assert all(result['is_fire'] for result in results[1:])
+    assert results[-1]['active_ratio'] > 0.05
+
+
+def test_static_red_object_is_learned():
+    detector = FireDetector(width=0, threshold=0.05, min_flicker=0.1, static_alpha=0.1)
+    frame = blob_frame(30)
+    results = [detector.detect(frame, camera_id=1, now=index * 10.0) for index in range(30)]
+    assert not any(result['is_fire'] for result in results)
+    assert results[-1]['active_ratio'] == 0.0
@@ -0,0 +1,43 @@
+import cv2
+import numpy as np
+from PIL import Image
+
+from analyzer import FramePreprocessor
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+def reference(frame, mean, std, rescale_factor=1 / 255):
+    """Référence NumPy: BGR -> RGB, mise à l'échelle, normalisation, HWC -> CHW"""
+    rgb = frame[..., ::-1].astype(np.float64) * rescale_factor
+    return ((rgb - np.array(mean)) / np.array(std)).transpose(2, 0, 1)
+
+
+def frames(count, shape=(96, 128, 3), seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(count)]
+
+
+def test_normalize_matches_numpy_reference():
+    preprocessor = FramePreprocessor(size=(96, 128), mean=IMAGENET_MEAN, std=IMAGENET_STD, max_batch_size=2)
+    batch = frames(3)  # au-delà du tampon préalloué
+    output = preprocessor(batch).numpy()
+    
+    assert output.shape == (3, 3, 96, 128)
+    assert output.dtype == np.float32
+    for frame, tensor in zip(batch, output):
+        np.testing.assert_allclose(tensor, reference(frame, IMAGENET_MEAN, IMAGENET_STD), atol=1e-5)
+
+
+def test_resize_then_normalize_matches_reference():
+    preprocessor = FramePreprocessor(size=(32, 48))
+    frame = frames(1, shape=(120, 160, 3))[0]
+    output = preprocessor([frame]).numpy()[0]
+    resized = cv2.resize(frame, (48, 32), interpolation=cv2.INTER_AREA)
+    np.testing.assert_allclose(output, reference(resized, (0.5,) * 3, (0.5,) * 3), atol=1e-5)
+    
+    exact = FramePreprocessor(size=(32, 48), exact_resize=True)
+    output = exact([frame]).numpy()[0]
+    resized = np.asarray(Image.fromarray(frame).resize((48, 32), Image.BILINEAR))
+    np.testing.assert_allclose(output, reference(resized, (0.5,) * 3, (0.5,) * 3), atol=1e-5)
@@ -0,0 +1,31 @@
+import cv2
+import numpy as np
+
+from analyzer import MotionDetector
+
+
+def square_frame(x):
+    """Frame 160x120 noire avec un carré blanc à l'abscisse x"""
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    cv2.rectangle(frame, (x, 40), (x + 30, 70), (255, 255, 255), -1)
+    return frame
+
+
+def test_skipped_frame_does_not_expose_stale_buffers():
+    detector = MotionDetector(width=0, frame_skip=1, detect_shadows=False)
+    for _ in range(5):
+        detector.apply(square_frame(10))
+        detector.apply(square_frame(10))
+        
+    detector.apply(square_frame(100))
+    assert detector.current
+    assert detector.motion_boxes(min_area=0.001)
+    
+    # Frame sautée: gray et fg_mask sont ceux de la frame précédente
+    detector.apply(square_frame(10))
+    assert detector.mask_index == detector.frame_index - 1
+    assert not detector.current
+    assert detector.motion_boxes() is None
+    
+    detector.apply(square_frame(10))
+    assert detector.current
@@ -0,0 +1,48 @@
+import numpy as np
+
+from analyzer import ResultCache
+
+RESULT = {'analysis_type': 'violence', 'result': 'non_violent', 'confidence': 0.9, 'details': {}}
+
+
+def frame(value=100):
+    return np.full((120, 160, 3), value, dtype=np.uint8)
+
+
+def test_lookup_reuses_result_of_near_identical_frame():
+    cache = ResultCache(size=32, threshold=10, max_changed=0.01, ttl=10.0)
+    cache.store(1, 'violence', cache.signature(frame(100)), RESULT, now=0.0)
+    
+    # Bruit sous le seuil sur toute l'image: même résultat
+    assert cache.lookup(1, 'violence', cache.signature(frame(105)), now=1.0) is RESULT
+    
+    # Changement global au-delà du seuil, autre caméra ou autre analyse: pas de réutilisation
+    assert cache.lookup(1, 'violence', cache.signature(frame(130)), now=1.0) is None
+    assert cache.lookup(2, 'violence', cache.signature(frame(100)), now=1.0) is None
+    assert cache.lookup(1, 'fire', cache.signature(frame(100)), now=1.0) is None
+    assert cache.get_stats(1) == {'hits': 1, 'misses': 2, 'hit_rate': 0.333}
+
+
+def test_lookup_counts_changed_cells():
+    cache = ResultCache(size=32, threshold=10, max_changed=0.01, ttl=10.0)
+    cache.store(1, 'violence', cache.signature(frame(100)), RESULT, now=0.0)
+    
+    # Une zone locale (personne qui entre) dépasse la proportion de cellules tolérée
+    changed = frame(100)
+    changed[:30, :40] = 255
+    assert cache.lookup(1, 'violence', cache.signature(changed), now=1.0) is None
+    
+    # 10 cellules sur 1024 changées: tolérées
+    signature = cache.signature(frame(100))
+    signature.flat[:10] = 255
+    assert cache.lookup(1, 'violence', signature, now=1.0) is RESULT
+
+
+def test_lookup_expires_entries_and_forget_clears_camera():
+    cache = ResultCache(ttl=10.0)
+    cache.store(1, 'violence', cache.signature(frame()), RESULT, now=0.0)
+    assert cache.lookup(1, 'violence', cache.signature(frame()), now=11.0) is None
+    
+    cache.store(1, 'violence', cache.signature(frame()), RESULT, now=20.0)
+    cache.forget(1)
+    assert cache.lookup(1, 'violence', cache.signature(frame()), now=21.0) is None
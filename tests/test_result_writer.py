@@ -0,0 +1,69 @@
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
+
+from analyzer import ResultWriter
+
+
+class InterleavedDatabase:
+    """Base factice dont les ids auto-incrémentés ne sont pas consécutifs (autre écrivain, pas de 2)"""
+    
+    def __init__(self):
+        self.next_id = 1
+        self.images = {}
+        self.results = []
+        self.lastrowid = None
+        
+    @contextmanager
+    def connection(self):
+        yield self
+        
+    def cursor(self):
+        return self
+        
+    def start_transaction(self):
+        pass
+        
+    def execute(self, query, params=None):
+        assert 'INTO image' in query
+        self.next_id += 3  # ids pris entre-temps par un autre processus
+        self.lastrowid = self.next_id
+        self.images[self.lastrowid] = params[1]
+        
+    def executemany(self, query, rows):
+        assert 'INTO resultat_analyse' in query
+        self.results.extend(rows)
+        
+    def commit(self):
+        pass
+        
+    def close(self):
+        pass
+
+
+def test_results_reference_their_own_image_row():
+    database = InterleavedDatabase()
+    writer = ResultWriter(database)
+    when = datetime(2026, 1, 1)
+    batch = [(when, f'/images/{index}.jpg', [(1, 'high', when), (2, 'low', when)]) for index in range(3)]
+    
+    assert writer._flush(batch)
+    assert len(database.results) == 6
+    for fk_image, fk_analyse, *_ in database.results:
+        assert database.images[fk_image].startswith('/images/')
+    assert [database.images[row[0]] for row in database.results[::2]] == [path for _, path, _ in batch]
+
+
+def test_unwritten_images_create_no_row():
+    database = InterleavedDatabase()
+    writer = ResultWriter(database, image_timeout=0.01)
+    when = datetime(2026, 1, 1)
+    dropped, written, pending = Future(), Future(), Future()
+    dropped.set_result(None)
+    written.set_result('/images/ok.jpg')
+    batch = [(when, image, [(1, 'high', when)]) for image in (dropped, written, pending, '')]
+    
+    assert writer._flush(batch)
+    assert list(database.images.values()) == ['/images/ok.jpg']
+    assert len(database.results) == 1
+    assert writer.get_stats()['skipped'] == 3